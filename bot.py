@@ -31,6 +31,8 @@ DB_FILE = Path() / "data.sqlite"
 BOT_PREFIX = os.environ.get("BOT_PREFIX")
 # token to use
 TOKEN = os.environ.get("BOT_TOKEN")
+# milliseconds after which a database statement is logged as slow, 0 to disable
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS") or 100)
 
 
 class EmbedHelp(commands.MinimalHelpCommand):
@@ -164,8 +166,12 @@ class FacilityBot(commands.Bot):
         self.guild_logs: dict[int, deque[str]] = {}
 
         from cogs.utils.sqlite import Database
+        from cogs.utils.preferences import Preferences
+        from cogs.utils.outbound import OutboundQueue
 
-        self.db = Database(self, DB_FILE)
+        self.db = Database(self, DB_FILE, slow_query_threshold=SLOW_QUERY_MS / 1000)
+        self.preferences = Preferences(self)
+        self.outbound = OutboundQueue()
 
     async def start(self) -> None:
         if TOKEN is None:
@@ -181,6 +187,9 @@ class FacilityBot(commands.Bot):
         else:
             self.owner_id = app.owner.id
 
+        self.outbound.start()
+        await self.db.open()
+
         for extension in EXTENSIONS:
             try:
                 await self.load_extension(extension)
@@ -189,8 +198,10 @@ class FacilityBot(commands.Bot):
             else:
                 logger.info("Loaded extension %r", extension)
 
-        if not DB_FILE.exists():
-            await self.db.create()
+    async def close(self) -> None:
+        await super().close()
+        await self.outbound.close()
+        await self.db.close()
 
     async def on_ready(self) -> None:
         logger.info(
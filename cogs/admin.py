@@ -10,6 +10,7 @@ from .utils.views import ModifyFacilityView, RemoveFacilitiesView
 from .utils.embeds import FeedbackEmbed, FeedbackType
 from .utils.transformers import FacilityTransformer, IdTransformer
 from .utils.errors import MessageError
+from .utils.sqlite import FacilityQuery
 
 
 if TYPE_CHECKING:
@@ -61,11 +62,8 @@ class Admin(commands.Cog):
         Args:
             user (Member): Member's facilities to remove
         """
-        search_dict = {
-            " guild_id == ? ": interaction.guild_id,
-            " author == ? ": user.id,
-        }
-        facilities = await self.bot.db.get_facilities(search_dict)
+        query = FacilityQuery(guild_id=interaction.guild_id, author=user.id)
+        facilities = await self.bot.db.get_facilities(query)
 
         if not facilities:
             raise MessageError("No facilities")
@@ -93,13 +91,15 @@ class Admin(commands.Cog):
         Args:
             ids (app_commands.Transform[tuple, IdTransformer]): List of facility ID's to remove with a delimiter of ',' or a space ' ' Ex. 1,3 4 8
         """
-        facilities = await self.bot.db.get_facility_ids(ids, interaction.guild_id)
+        facilities, missing_ids = await self.bot.db.get_facility_ids(
+            ids, interaction.guild_id
+        )
 
         if not facilities:
             raise MessageError("No facilities")
 
         facility_amount = len(facilities)
-        not_found_facilities = len(ids) - len(facilities)
+        not_found_facilities = len(missing_ids)
         embed = FeedbackEmbed(
             f"Confirm removing {facility_amount} facilit{'ies' if facility_amount > 1 else 'y'} from {interaction.guild.name}",
             FeedbackType.WARNING,
@@ -126,8 +126,8 @@ class Admin(commands.Cog):
     async def all(self, interaction: GuildInteraction):
         """Removes all facilities for the current guild"""
 
-        search_dict = {"guild_id == ?": interaction.guild_id}
-        facilities = await self.bot.db.get_facilities(search_dict)
+        query = FacilityQuery(guild_id=interaction.guild_id)
+        facilities = await self.bot.db.get_facilities(query)
 
         if not facilities:
             raise MessageError("No facilities found")
@@ -183,8 +183,8 @@ class Admin(commands.Cog):
     # @app_commands.checks.cooldown(1, 10, key=lambda i: (i.guild_id, i.user.id))
     # async def force_update(self, interaction: GuildInteraction):
     #     """Forces a list and forum update"""
-    #     search_dict = {"guild_id == ?": interaction.guild_id}
-    #     facilities = await self.bot.db.get_facilities(search_dict)
+    #     query = FacilityQuery(guild_id=interaction.guild_id)
+    #     facilities = await self.bot.db.get_facilities(query)
 
     #     events: Optional[Events] = self.bot.get_cog("Events")
     #     if not events:
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from functools import partial
 from typing import TYPE_CHECKING
 
 from discord import (
@@ -10,24 +13,43 @@ from discord import (
     Colour,
     PermissionOverwrite,
     Forbidden,
+    ForumChannel,
+    Guild,
+    Thread,
 )
 from discord.ext import commands
 
-from .utils.embeds import FeedbackEmbed, FeedbackType
+from .utils.embeds import FeedbackEmbed, FeedbackType, content_hash
 from .utils.views import SetDynamicList, create_list
 from .utils.errors import MessageError
-from .utils.sqlite import AdaptableList
+from .utils.sqlite import FacilityQuery
+from .utils.outbound import Priority
+from .utils.backfill import BackfillProgress, ForumBackfill
 from .events import Events
 
 
 if TYPE_CHECKING:
     from bot import FacilityBot
     from .utils.context import Context, GuildInteraction, ClientInteraction
+    from .utils.facility import Facility
+
+
+logger = logging.getLogger(__name__)
+
+
+def _backfill_embed(progress: BackfillProgress) -> FeedbackEmbed:
+    message = f"Creating forum threads {progress.done}/{progress.total}"
+    if progress.failed:
+        message += f", {progress.failed} failed"
+    return FeedbackEmbed(message, FeedbackType.INFO)
 
 
 class Config(commands.Cog):
     def __init__(self, bot: FacilityBot):
         self.bot: FacilityBot = bot
+        # mirror of the blacklist table, checked on every command
+        self.blacklisted: set[int] = set()
+        self._resume_task: asyncio.Task[None] | None = None
 
     @app_commands.command()  # type: ignore[arg-type]
     @app_commands.guild_only()
@@ -64,70 +86,172 @@ class Config(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        query = (
-            """INSERT OR REPLACE INTO guild_options (guild_id, forum_id) VALUES(?,?)"""
-        )
-        await self.bot.db.execute(query, guild.id, forum.id)
+        db = self.bot.db
+        await db.set_forum(guild.id, forum.id)
 
-        facilities = await self.bot.db.get_facilities({"guild_id = ?": guild.id})
+        facilities = await db.get_facilities(FacilityQuery(guild_id=guild.id))
 
         events = self.bot.get_cog("Events")
         if events is not None and isinstance(events, Events):
-            for facility in facilities:
-                await events.handle_forum(facility, guild.id)
+            await db.start_forum_backfill(guild.id, forum.id)
+            progress_message = await interaction.followup.send(
+                embed=_backfill_embed(BackfillProgress(0, 0, len(facilities))),
+                ephemeral=True,
+                wait=True,
+            )
+
+            async def report(progress: BackfillProgress) -> None:
+                await progress_message.edit(embed=_backfill_embed(progress))
+
+            backfill = ForumBackfill(self.bot, events, guild.id, progress=report)
+            try:
+                await backfill.run(facilities)
+            except Forbidden:
+                await db.finish_forum_backfill(guild.id)
+                embed = FeedbackEmbed(
+                    "No permission to manage forum, must have `Manage Posts`",
+                    FeedbackType.ERROR,
+                )
+                return await interaction.followup.send(embed=embed)
 
-        facility_list = await create_list(
-            facilities, interaction.guild, interaction.client
-        )
-        initial_embed = facility_list.pop(0)
         try:
-            thread, message = await forum.create_thread(
-                name="Index", embed=initial_embed
+            thread, messages, hashes = await self.post_forum_index(
+                guild, forum, facilities
             )
         except Forbidden:
+            await db.finish_forum_backfill(guild.id)
             embed = FeedbackEmbed(
                 "No permission to manage forum, must have `Manage Posts`",
                 FeedbackType.ERROR,
             )
             return await interaction.followup.send(embed=embed)
 
-        messages = [message.id]
-
-        await thread.edit(locked=True, pinned=True)
-        for embed in facility_list:
-            message = await thread.send(embed=embed)
-            messages.append(message.id)
-
         try:
-            await interaction.client.db.set_list(interaction.guild, thread, messages)
+            await db.set_list(guild, thread, messages, hashes)
         except Exception as exc:
             embed = FeedbackEmbed(
                 f"Failed to set list channel\n```py\n{exc}\n```", FeedbackType.ERROR
             )
             await interaction.followup.send(embed=embed)
             raise exc
+        await db.finish_forum_backfill(guild.id)
 
         await interaction.followup.send(
             embed=FeedbackEmbed(f"Created forum {forum.mention}", FeedbackType.SUCCESS),
             ephemeral=True,
         )
 
+    async def post_forum_index(
+        self, guild: Guild, forum: ForumChannel, facilities: list[Facility]
+    ) -> tuple[Thread, list[int], list[int]]:
+        """Posts the facility list in a pinned thread of the forum
+
+        Args:
+            guild (Guild): Guild of the forum
+            forum (ForumChannel): Forum to post in
+            facilities (list[Facility]): Facilities of the guild
+
+        Raises:
+            Forbidden: Missing permissions to manage the forum
+
+        Returns:
+            tuple[Thread, list[int], list[int]]: Thread, message IDs and content hashes
+            to pass to :meth:`Database.set_list`
+        """
+        facility_list = await create_list(facilities, guild, self.bot)
+        hashes = [content_hash(embed) for embed in facility_list]
+        initial_embed = facility_list.pop(0)
+        outbound = self.bot.outbound
+        thread, message = await outbound.run(
+            partial(forum.create_thread, name="Index", embed=initial_embed),
+            priority=Priority.INTERACTIVE,
+            route=forum.id,
+        )
+
+        messages = [message.id]
+
+        await outbound.run(
+            partial(thread.edit, locked=True, pinned=True),
+            priority=Priority.INTERACTIVE,
+            route=forum.id,
+        )
+        for embed in facility_list:
+            message = await outbound.run(
+                partial(thread.send, embed=embed),
+                priority=Priority.INTERACTIVE,
+                route=thread.id,
+            )
+            messages.append(message.id)
+        return thread, messages, hashes
+
+    async def resume_forum_backfills(self) -> None:
+        """Finishes forum backfills interrupted by a restart"""
+        await self.bot.wait_until_ready()
+        for guild_id, forum_id in await self.bot.db.pending_forum_backfills():
+            try:
+                await self._resume_forum_backfill(guild_id, forum_id)
+            except Exception:
+                logger.exception("Failed resuming forum backfill of %r", guild_id)
+
+    async def _resume_forum_backfill(self, guild_id: int, forum_id: int) -> None:
+        db = self.bot.db
+        guild = self.bot.get_guild(guild_id)
+        forum = guild and guild.get_channel(forum_id)
+        events = self.bot.get_cog("Events")
+        if (
+            guild is None
+            or not isinstance(forum, ForumChannel)
+            or not isinstance(events, Events)
+            or db.guild_location(guild_id).forum_id != forum_id
+        ):
+            # the forum was replaced or can't be reached anymore
+            await db.finish_forum_backfill(guild_id)
+            return
+
+        facilities = await db.get_facilities(FacilityQuery(guild_id=guild_id))
+        # a thread created right before the restart may be missing its stored ID,
+        # those are matched by name instead of being created again
+        recorded = {facility.thread_id for facility in facilities}
+        unrecorded: dict[str, list[Thread]] = {}
+        for thread in forum.threads:
+            if thread.owner_id == self.bot.user.id and thread.id not in recorded:
+                unrecorded.setdefault(thread.name, []).append(thread)
+
+        # facilities synced before the restart already have a thread in the forum
+        pending: list[Facility] = []
+        for facility in facilities:
+            if forum.get_thread(facility.thread_id or 0) is not None:
+                continue
+            name = f"{facility.name} - {facility.marker}, {facility.region}"
+            if unrecorded.get(name):
+                facility.thread_id = unrecorded[name].pop().id
+            else:
+                pending.append(facility)
+        await db.update_thread_ids(facilities)
+        logger.info(
+            "Resuming forum backfill of %r, %r of %r facilities left",
+            guild_id,
+            len(pending),
+            len(facilities),
+        )
+        try:
+            await ForumBackfill(self.bot, events, guild_id).run(pending)
+            thread, messages, hashes = await self.post_forum_index(
+                guild, forum, facilities
+            )
+        except Forbidden:
+            logger.warning(
+                "Missing permissions to resume forum backfill of %r", guild_id
+            )
+        else:
+            await db.set_list(guild, thread, messages, hashes)
+        await db.finish_forum_backfill(guild_id)
+
     @app_commands.command()  # type: ignore[arg-type]
     @app_commands.checks.cooldown(1, 4, key=lambda i: (i.guild_id, i.user.id))
     async def toggle_ephemeral(self, interaction: ClientInteraction):
         """Toggles user preference for ephemeral messages"""
-        query = """SELECT ephemeral FROM user_options WHERE user_id = ?"""
-        current_choice_row = await self.bot.db.fetch_one(query, interaction.user.id)
-        if not current_choice_row:
-            current_choice = False
-        else:
-            current_choice = current_choice_row[0]
-
-        new_choice = not current_choice
-        query = """INSERT OR REPLACE INTO user_options VALUES (?,?)"""
-        current_choice_row = await self.bot.db.execute(
-            query, interaction.user.id, new_choice
-        )
+        new_choice = await self.bot.preferences.toggle_ephemeral(interaction.user.id)
 
         if new_choice is True:
             await interaction.response.send_message(
@@ -150,13 +274,9 @@ class Config(commands.Cog):
         Args:
             channel (TextChannel): Channel to set, defaults to current channel
         """
-        search_dict = {" guild_id == ? ": interaction.guild_id}
-        facility_list = await self.bot.db.get_facilities(search_dict)
-        forum_row = await self.bot.db.fetch_one(
-            """SELECT forum_id FROM guild_options WHERE guild_id = ?""",
-            interaction.guild_id,
-        )
-        forum = forum_row[0] if forum_row else None
+        query = FacilityQuery(guild_id=interaction.guild_id)
+        facility_list = await self.bot.db.get_facilities(query)
+        forum = self.bot.db.guild_location(interaction.guild_id).forum_id
 
         embed = FeedbackEmbed(
             "Choose to display list in the forum (button will disable if not setup) or in a normal channel",
@@ -182,19 +302,12 @@ class Config(commands.Cog):
         Args:
             channel (TextChannel): Channel to add
         """
-        query = """SELECT channel_ids from response WHERE guild_id = ?"""
-        previous_ids = await self.bot.db.fetch_one(query, interaction.guild_id)
-
-        if previous_ids:
-            channel_list: list = previous_ids[0]
-            channel_list.append(channel.id)
-        else:
-            channel_list = [channel.id]
-
-        query = """INSERT OR REPLACE INTO response VALUES (?,?)"""
-        await self.bot.db.execute(
-            query, interaction.guild_id, AdaptableList(channel_list)
-        )
+        db = self.bot.db
+        channel_ids = db.response_channels.get(interaction.guild_id, ())
+        if channel.id not in channel_ids:
+            await db.set_response_channels(
+                interaction.guild_id, [*channel_ids, channel.id]
+            )
         await interaction.response.send_message(":white_check_mark:")
 
     @response.command()  # type: ignore[arg-type]
@@ -205,35 +318,22 @@ class Config(commands.Cog):
         Args:
             channel (TextChannel): Channel to remove
         """
-        query = """SELECT channel_ids from response WHERE guild_id = ?"""
-        previous_ids = await self.bot.db.fetch_one(query, interaction.guild_id)
-
-        if previous_ids:
-            channel_list: list = previous_ids[0]
-            try:
-                channel_list.remove(channel.id)
-            except ValueError:
-                pass
-
-            if channel_list:
-                query = """INSERT OR REPLACE INTO response VALUES (?,?)"""
-                await self.bot.db.execute(
-                    query, interaction.guild_id, AdaptableList(channel_list)
-                )
-            else:
-                query = """DELETE FROM response WHERE guild_id = ?"""
-                await self.bot.db.execute(query, interaction.guild_id)
+        db = self.bot.db
+        channel_ids = db.response_channels.get(interaction.guild_id, ())
+        if channel.id in channel_ids:
+            await db.set_response_channels(
+                interaction.guild_id,
+                [channel_id for channel_id in channel_ids if channel_id != channel.id],
+            )
         await interaction.response.send_message(":white_check_mark:")
 
     @response.command()  # type: ignore[arg-type]
     @app_commands.checks.cooldown(1, 4, key=lambda i: (i.guild_id, i.user.id))
     async def list(self, interaction: GuildInteraction):
         """lists channels responding to questions"""
-        query = """SELECT channel_ids from response WHERE guild_id = ?"""
-        channel_row = await self.bot.db.fetch_one(query, interaction.guild_id)
-        if not channel_row:
+        channel_ids = self.bot.db.response_channels.get(interaction.guild_id)
+        if not channel_ids:
             raise MessageError("No channels set")
-        channel_ids: list[int] = channel_row[0]
 
         embed = Embed(colour=Colour.blurple())
         items = []
@@ -255,6 +355,7 @@ class Config(commands.Cog):
     async def blacklist_add(self, ctx: Context, object_id: int, reason: str = ""):
         query = """INSERT OR IGNORE INTO blacklist (object_id, reason) VALUES (?, ?)"""
         await self.bot.db.execute(query, object_id, reason)
+        self.blacklisted.add(object_id)
         await ctx.send(content=":white_check_mark:")
 
     @blacklist.command(name="remove")  # type: ignore[arg-type]
@@ -262,52 +363,47 @@ class Config(commands.Cog):
     async def blacklist_remove(self, ctx: Context, object_id: int):
         query = """DELETE FROM blacklist WHERE object_id = ?"""
         await self.bot.db.execute(query, object_id)
+        self.blacklisted.discard(object_id)
         await ctx.send(content=":white_check_mark:")
 
-    async def is_blacklisted(self, entity_id: int) -> bool:
-        query = """SELECT 1 FROM blacklist WHERE object_id = ?"""
-        result = await self.bot.db.fetch(
-            query,
-            entity_id,
-        )
-        return bool(result)
+    def is_blacklisted(self, *entity_ids: int | None) -> bool:
+        """Checks the in memory blacklist, no database access
+
+        Args:
+            *entity_ids (int | None): User or guild IDs, None is ignored
+
+        Returns:
+            bool: Whether any of the IDs are blacklisted
+        """
+        blacklisted = self.blacklisted
+        return any(entity_id in blacklisted for entity_id in entity_ids)
 
     async def blacklist_interaction_check(self, interaction: ClientInteraction) -> bool:
-        is_owner = await interaction.client.is_owner(interaction.user)
-        if is_owner:
+        if not self.is_blacklisted(interaction.user.id, interaction.guild_id):
             return True
 
-        for check_entity in (
-            interaction.user.id,
-            interaction.guild and interaction.guild.id,
-        ):
-            if check_entity:
-                result = await self.is_blacklisted(check_entity)
-                if result:
-                    return False
-
-        return True
+        return await interaction.client.is_owner(interaction.user)
 
     async def cog_load(self) -> None:
+        rows = await self.bot.db.fetch("""SELECT object_id FROM blacklist""")
+        self.blacklisted = {row[0] for row in rows}
+
         tree = self.bot.tree
         tree.interaction_check = self.blacklist_interaction_check
 
+        self._resume_task = asyncio.create_task(self.resume_forum_backfills())
+
     async def cog_unload(self) -> None:
+        if self._resume_task is not None:
+            self._resume_task.cancel()
         tree = self.bot.tree
         tree.interaction_check = tree.__class__.interaction_check
 
     async def bot_check_once(self, ctx: Context) -> bool:
-        is_owner = await ctx.bot.is_owner(ctx.author)
-        if is_owner:
+        if not self.is_blacklisted(ctx.author.id, ctx.guild and ctx.guild.id):
             return True
 
-        for check_entity in (ctx.author.id, ctx.guild and ctx.guild.id):
-            if check_entity:
-                result = await self.is_blacklisted(check_entity)
-                if result:
-                    return False
-
-        return True
+        return await ctx.bot.is_owner(ctx.author)
 
 
 async def setup(bot: FacilityBot) -> None:
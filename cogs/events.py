@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import logging
-import itertools
-from typing import TYPE_CHECKING
-from rapidfuzz import process
+from functools import partial
+from collections import Counter
+from typing import Awaitable, Callable, Iterable, TypeVar, TYPE_CHECKING
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
 
 from discord import (
     Guild,
@@ -14,12 +16,18 @@ from discord import (
     ForumChannel,
     Thread,
     Forbidden,
+    HTTPException,
     Object,
+    RawMessageDeleteEvent,
+    RawBulkMessageDeleteEvent,
 )
-from discord.ext import commands
+from discord.ext import commands, tasks
 
-from .utils.embeds import create_list
+from .utils.embeds import create_list, content_hash
 from .utils.cost import Building, Cost, building_data
+from .utils.sqlite import FacilityQuery
+from .utils.scheduler import RefreshScheduler
+from .utils.outbound import Priority
 
 
 if TYPE_CHECKING:
@@ -30,9 +38,20 @@ if TYPE_CHECKING:
     from .utils.context import GuildInteraction, ClientInteraction
 
 
+logger = logging.getLogger(__name__)
 guild_logger = logging.getLogger("guild_event")
 facility_logger = logging.getLogger("facility_event")
 
+T = TypeVar("T")
+
+# buffered command stats are written after this many seconds or command runs
+COMMAND_STATS_FLUSH_INTERVAL = 60
+COMMAND_STATS_FLUSH_COUNT = 50
+# facility changes are synced to the forum and list once a guild had no changes
+# for this many seconds, or at the latest this many seconds after the first one
+REFRESH_QUIET_PERIOD = 5
+REFRESH_MAX_DELAY = 30
+
 
 def generate_message(building: Building):
     def format_cost(cost: Cost):
@@ -52,10 +71,21 @@ def generate_message(building: Building):
     return embed
 
 
+# building names preprocessed once instead of on every lookup
+_BUILDING_NAMES = list(building_data)
+_PROCESSED_BUILDING_NAMES = [default_process(name) for name in _BUILDING_NAMES]
+
+
 def process_response(user_input: str):
-    choice = process.extractOne(user_input, building_data.keys(), score_cutoff=80)
+    choice = process.extractOne(
+        default_process(user_input),
+        _PROCESSED_BUILDING_NAMES,
+        scorer=fuzz.WRatio,
+        processor=None,
+        score_cutoff=80,
+    )
     if choice:
-        building = building_data[choice[0]]
+        building = building_data[_BUILDING_NAMES[choice[2]]]
         return generate_message(building)
     return None
 
@@ -63,15 +93,54 @@ def process_response(user_input: str):
 class Events(commands.Cog):
     def __init__(self, bot: FacilityBot) -> None:
         self.bot: FacilityBot = bot
+        self._command_stats: Counter[tuple[str, int]] = Counter()
+        # latest version of each changed facility per guild and if it was deleted
+        self._pending_forum: dict[int, dict[int, tuple[Facility, bool]]] = {}
+        # list messages deleted by someone, their hash can't be trusted anymore
+        self._deleted_list_messages: dict[int, set[int]] = {}
+        self.refresh_scheduler: RefreshScheduler[int] = RefreshScheduler(
+            self.refresh_guild,
+            quiet_period=REFRESH_QUIET_PERIOD,
+            max_delay=REFRESH_MAX_DELAY,
+        )
+
+    async def cog_load(self) -> None:
+        self.flush_command_stats_loop.start()
+
+    async def cog_unload(self) -> None:
+        self.flush_command_stats_loop.cancel()
+        await self.flush_command_stats()
+        await self.refresh_scheduler.flush()
 
     @commands.Cog.listener()
     async def on_app_command_completion(
         self, interaction: ClientInteraction, command: Command | ContextMenu
     ) -> None:
-        insert_query = """INSERT INTO command_stats VALUES (?, ?, ?) ON CONFLICT(name, guild_id) DO UPDATE SET run_count = run_count + 1"""
-        await self.bot.db.execute(
-            insert_query, command.qualified_name, 1, interaction.guild_id or 0
-        )
+        self._command_stats[(command.qualified_name, interaction.guild_id or 0)] += 1
+        if self._command_stats.total() >= COMMAND_STATS_FLUSH_COUNT:
+            await self.flush_command_stats()
+
+    @tasks.loop(seconds=COMMAND_STATS_FLUSH_INTERVAL)
+    async def flush_command_stats_loop(self) -> None:
+        try:
+            await self.flush_command_stats()
+        except Exception:
+            logger.exception("Failed writing command stats")
+
+    async def flush_command_stats(self) -> None:
+        """Writes buffered command run counts in a single transaction"""
+        if not self._command_stats:
+            return
+
+        stats, self._command_stats = self._command_stats, Counter()
+        insert_query = """INSERT INTO command_stats VALUES (?, ?, ?) ON CONFLICT(name, guild_id) DO UPDATE SET run_count = run_count + excluded.run_count"""
+        params = [(name, count, guild_id) for (name, guild_id), count in stats.items()]
+        try:
+            await self.bot.db.executemany(insert_query, params)
+        except Exception:
+            # keep the counts so they are written with the next flush
+            self._command_stats.update(stats)
+            raise
 
     @commands.Cog.listener()
     async def on_guild_join(
@@ -116,23 +185,53 @@ class Events(commands.Cog):
                 await info_command(ctx)
             except Exception:
                 pass
-        elif message.content.lower().startswith("how much does"):
-            if not message.guild:
-                return
-
-            query = """SELECT channel_ids from response WHERE guild_id = ?"""
-            channel_row = await self.bot.db.fetch_one(query, message.guild.id)
-            if not channel_row:
-                return
-
-            channel_ids: list[int] = channel_row[0]
-            if message.channel.id not in channel_ids:
-                return
-
+        elif (
+            message.guild
+            and message.channel.id
+            in self.bot.db.response_channels.get(message.guild.id, ())
+            and message.content.lower().startswith("how much does")
+        ):
             user_input = message.content[13:].strip()
             output = process_response(user_input)
             if output:
-                await message.channel.send(embed=output, reference=message)
+                await self.bot.outbound.run(
+                    partial(message.channel.send, embed=output, reference=message),
+                    priority=Priority.INTERACTIVE,
+                    route=message.channel.id,
+                )
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: RawMessageDeleteEvent) -> None:
+        """Reposts the list if one of its messages was deleted
+
+        Args:
+            payload (RawMessageDeleteEvent): Deleted message
+        """
+        await self._list_messages_deleted(payload.guild_id, {payload.message_id})
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(
+        self, payload: RawBulkMessageDeleteEvent
+    ) -> None:
+        """Reposts the list if any of its messages were deleted
+
+        Args:
+            payload (RawBulkMessageDeleteEvent): Deleted messages
+        """
+        await self._list_messages_deleted(payload.guild_id, payload.message_ids)
+
+    async def _list_messages_deleted(
+        self, guild_id: int | None, message_ids: set[int]
+    ) -> None:
+        if guild_id is None:
+            return
+        deleted = message_ids.intersection(
+            self.bot.db.guild_location(guild_id).list_messages
+        )
+        if not deleted:
+            return
+        self._deleted_list_messages.setdefault(guild_id, set()).update(deleted)
+        self.refresh_scheduler.mark(guild_id)
 
     @commands.Cog.listener()
     async def on_facility_create(
@@ -150,8 +249,7 @@ class Events(commands.Cog):
             facility.id_,
             extra={"ctx": ctx},
         )
-        await self.handle_forum(facility, ctx.guild_id)
-        await self.update_list(ctx.guild)
+        self.schedule_refresh(ctx.guild_id, facility)
 
     @commands.Cog.listener()
     async def on_facility_modify(
@@ -170,8 +268,7 @@ class Events(commands.Cog):
             ctx.user.mention,
             extra={"ctx": ctx},
         )
-        await self.handle_forum(after, ctx.guild_id)
-        await self.update_list(ctx.guild)
+        self.schedule_refresh(ctx.guild_id, after)
 
     @commands.Cog.listener()
     async def on_bulk_facility_delete(
@@ -189,119 +286,226 @@ class Events(commands.Cog):
             ctx.user.mention,
             extra={"ctx": ctx},
         )
-        for facility in facilities:
-            await self.handle_forum(facility, ctx.guild_id, True)
-        await self.update_list(ctx.guild)
+        self.schedule_refresh(ctx.guild_id, *facilities, delete=True)
 
-    async def update_list(self, guild: Guild) -> None:
-        list_location = await self.bot.db.get_list(guild)
-        if not list_location:
-            return
+    def schedule_refresh(
+        self, guild_id: int, *facilities: Facility, delete: bool = False
+    ) -> None:
+        """Queues forum threads of facilities and the guild's list to be synced,
+        changes made shortly after each other are synced together
 
-        search_dict = {" guild_id == ? ": guild.id}
-        facilities: list[Facility] = await self.bot.db.get_facilities(search_dict)
+        Args:
+            guild_id (int): Guild of the facilities
+            *facilities (Facility): Facilities that changed
+            delete (bool, optional): If the facilities were removed. Defaults to False.
+        """
+        pending = self._pending_forum.setdefault(guild_id, {})
+        for facility in facilities:
+            pending[facility.id_] = (facility, delete)
+        self.refresh_scheduler.mark(guild_id)
 
-        channel_id, messages = list_location
-        embeds = await create_list(facilities, guild, self.bot)
+    async def refresh_guild(self, guild_id: int) -> None:
+        """Syncs the forum threads of facilities changed since the last refresh
+        and then the list
 
-        async def remove_messages():
-            for message in messages:
-                message = channel.get_partial_message(message)
+        Args:
+            guild_id (int): Guild to refresh
+        """
+        pending = self._pending_forum.pop(guild_id, {})
+        await self._restore_thread_ids(
+            facility
+            for facility, delete in pending.values()
+            if not delete and facility.thread_id is None
+        )
+        try:
+            for facility, delete in pending.values():
                 try:
-                    await message.delete()
-                except NotFound:
-                    pass
+                    await self.handle_forum(facility, guild_id, delete, write=False)
+                except HTTPException:
+                    logger.exception(
+                        "Failed syncing forum thread of facility %r", facility.id_
+                    )
+        finally:
+            await self.bot.db.update_thread_ids(
+                facility for facility, delete in pending.values() if not delete
+            )
+
+        guild = self.bot.get_guild(guild_id)
+        if guild is not None:
+            await self.update_list(guild)
+
+    async def _restore_thread_ids(self, facilities: Iterable[Facility]) -> None:
+        # a facility loaded before an earlier refresh wrote its new thread ID,
+        # e.g. by /modify, would otherwise get a second thread
+        missing = {facility.id_: facility for facility in facilities}
+        if not missing:
+            return
+        thread_ids = await self.bot.db.get_thread_ids(missing)
+        for id_, thread_id in thread_ids.items():
+            facility = missing[id_]
+            facility.thread_id = thread_id
+            facility.mark_clean("thread_id")
+
+    async def update_list(self, guild: Guild) -> None:
+        """Brings a guild's list up to date, only messages whose embed changed
+        are edited and messages are only added or removed at the end
+
+        Args:
+            guild (Guild): Guild to update the list of
+        """
+        db = self.bot.db
+        location = db.guild_location(guild.id)
+        channel_id = location.list_channel_id
+        if channel_id is None:
+            return
 
         channel = self.bot.get_channel(channel_id)
         if channel is None:
             return
 
-        # TODO: Rework this
-        if not isinstance(channel, Thread):
-            if len(embeds) != len(messages):
-                await remove_messages()
+        query = FacilityQuery(guild_id=guild.id, order_by_region=True)
+        if guild.id in db.cache:
+            embeds = await create_list(await db.get_facilities(query), guild, self.bot)
+        else:
+            # streamed so the list of a guild that isn't cached doesn't load
+            # every facility at once
+            async with db.stream_facilities(query) as (total, facilities):
+                embeds = await create_list(facilities, guild, self.bot, total=total)
+        hashes = [content_hash(embed) for embed in embeds]
+
+        messages = location.list_messages
+        posted_hashes = location.list_hashes
+        deleted = self._deleted_list_messages.pop(guild.id, set())
+        # messages that can be reused, the rest are deleted once the list is sent
+        reusable = len(messages)
+        if (
+            messages
+            and not isinstance(channel, Thread)
+            and len(embeds) > reusable
+            and channel.last_message_id != messages[-1]
+        ):
+            # something was sent after the list, appending would split it
+            reusable = 0
+
+        def run(
+            factory: Callable[[], Awaitable[T]], *, idempotent: bool = False
+        ) -> Awaitable[T]:
+            return self.bot.outbound.run(
+                factory,
+                priority=Priority.LIST_SYNC,
+                route=channel_id,
+                idempotent=idempotent,
+            )
 
-            else:
-                for message_id, embed in zip(messages, embeds):
-                    message = channel.get_partial_message(message_id)
+        new_messages: list[int] = []
+        try:
+            for index, (embed, embed_hash) in enumerate(zip(embeds, hashes)):
+                if index < reusable:
+                    message_id = messages[index]
+                    if (
+                        index < len(posted_hashes)
+                        and posted_hashes[index] == embed_hash
+                        and message_id not in deleted
+                    ):
+                        new_messages.append(message_id)
+                        continue
                     try:
-                        await message.edit(embed=embed)
+                        message = channel.get_partial_message(message_id)
+                        await run(partial(message.edit, embed=embed), idempotent=True)
                     except NotFound:
-                        await remove_messages()
-                        break
-                    except Forbidden:
-                        break
-                else:
-                    return
-
-            new_messages = []
-            for embed in embeds:
-                message = await channel.send(embed=embed)
+                        # can't insert in the middle, send the rest again
+                        reusable = index
+                    else:
+                        new_messages.append(message_id)
+                        continue
+
+                message = await run(partial(channel.send, embed=embed))
                 new_messages.append(message.id)
+        except Forbidden:
+            logger.warning("Missing permissions to update list in guild %r", guild.id)
+            return
 
-            return await self.bot.db.set_list(guild, channel, new_messages)
-        else:
-            new_messages = []
-            for embed, message_id in itertools.zip_longest(
-                embeds, messages, fillvalue=None
-            ):
-                if message_id is None:
-                    new_message = await channel.send(embed=embed)
-                    new_messages.append(new_message)
-                    continue
-
-                message = channel.get_partial_message(message_id)
-                if embed is None:
-                    await message.delete()
-                    continue
-                try:
-                    await message.edit(embed=embed)
-                    new_messages.append(message.id)
-                except (NotFound, Forbidden):
-                    return
+        for message_id in messages[min(reusable, len(embeds)) :]:
+            try:
+                await run(
+                    channel.get_partial_message(message_id).delete, idempotent=True
+                )
+            except NotFound:
+                pass
 
-            return await self.bot.db.set_list(guild, channel, new_messages)
+        if tuple(new_messages) == messages and tuple(hashes) == posted_hashes:
+            return
+        await self.bot.db.set_list(guild, channel, new_messages, hashes)
 
     async def handle_forum(
-        self, facility: Facility, guild_id: int, delete: bool = False
+        self,
+        facility: Facility,
+        guild_id: int,
+        delete: bool = False,
+        *,
+        write: bool = True,
     ) -> None:
-        query = """SELECT forum_id FROM guild_options WHERE guild_id == ?"""
-        forum_tuple = await self.bot.db.fetch_one(query, guild_id)
-        if not len(forum_tuple) > 0:
+        """Creates, updates or deletes the forum thread of a facility
+
+        Args:
+            facility (Facility): Facility to sync
+            guild_id (int): Guild of the facility
+            delete (bool, optional): Delete the thread instead. Defaults to False.
+            write (bool, optional): Write a new thread ID straight away, pass False
+                to batch them with :meth:`Database.update_thread_ids`. Defaults to True.
+        """
+        forum_id = self.bot.db.guild_location(guild_id).forum_id
+        if forum_id is None:
             return
-        forum_id = forum_tuple[0]
         forum = self.bot.get_channel(forum_id)
         if not isinstance(forum, ForumChannel):
             return
 
+        def run(
+            factory: Callable[[], Awaitable[T]],
+            route: int,
+            *,
+            idempotent: bool = True,
+        ) -> Awaitable[T]:
+            return self.bot.outbound.run(
+                factory,
+                priority=Priority.FORUM_SYNC,
+                route=route,
+                idempotent=idempotent,
+            )
+
         thread = forum.get_thread(facility.thread_id or 0)
         if delete:
             facility.thread_id = None
             if thread is None:
                 return
-            return await thread.delete()
+            return await run(thread.delete, thread.id)
         if thread is None:
-            thread, _ = await forum.create_thread(
-                name=f"{facility.name} - {facility.marker}, {facility.region}",
-                embeds=facility.embeds(),
+            thread, _ = await run(
+                partial(
+                    forum.create_thread,
+                    name=f"{facility.name} - {facility.marker}, {facility.region}",
+                    embeds=facility.embeds(),
+                ),
+                forum_id,
+                idempotent=False,
             )
+            facility.thread_id = thread.id
+            if write:
+                await self.bot.db.update_facility(facility)
             try:
-                await thread.add_user(Object(facility.author))
+                await run(partial(thread.add_user, Object(facility.author)), thread.id)
             except Forbidden:
                 pass
-            facility.thread_id = thread.id
-            await self.bot.db.update_facility(facility)
         else:
             updated_name = f"{facility.name} - {facility.marker}, {facility.region}"
             if thread.name != updated_name:
-                await thread.edit(name=updated_name)
+                await run(partial(thread.edit, name=updated_name), thread.id)
 
             message = thread.starter_message
             if not message:
-                message = await thread.fetch_message(thread.id)
-            await message.edit(
-                embeds=facility.embeds(),
-            )
+                message = await run(partial(thread.fetch_message, thread.id), thread.id)
+            await run(partial(message.edit, embeds=facility.embeds()), thread.id)
 
 
 async def setup(bot: FacilityBot) -> None:
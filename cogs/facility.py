@@ -12,15 +12,15 @@ from .utils.embeds import (
     FeedbackEmbed,
     FeedbackType,
     create_list,
-    ephemeral_info,
 )
 from .utils.facility import Facility
 from .utils.views import ModifyFacilityView, RemoveFacilitiesView, CreateFacilityView
 from .utils.regions import REGIONS, all_markers
 from .utils.flags import ItemServiceFlags, VehicleServiceFlags
-from .utils.paginator import Paginator
+from .utils.paginator import Paginator, FacilityPageSource
 from .utils.transformers import FacilityTransformer, IdTransformer
 from .utils.errors import MessageError
+from .utils.sqlite import FacilityQuery
 
 
 if TYPE_CHECKING:
@@ -175,11 +175,9 @@ class FacilityCog(commands.Cog):
         with self._facility_create_lock(interaction.user.id):
             final_coordinates = coordinates.upper() or location.coordinates
 
-            query = """SELECT count(id_) FROM facilities WHERE guild_id == ? AND author == ?"""
-            facility_count_row = await self.bot.db.fetch_one(
-                query, interaction.guild_id, interaction.user.id
+            facility_count = await self.bot.db.count_facilities(
+                FacilityQuery(guild_id=interaction.guild_id, author=interaction.user.id)
             )
-            facility_count: int = facility_count_row[0]
 
             if (
                 facility_count >= 20
@@ -248,11 +246,8 @@ class FacilityCog(commands.Cog):
             user (Member): Member's facilities to remove
         """
 
-        search_dict = {
-            " guild_id == ? ": interaction.guild_id,
-            " author == ? ": user.id,
-        }
-        facilities = await self.bot.db.get_facilities(search_dict)
+        query = FacilityQuery(guild_id=interaction.guild_id, author=user.id)
+        facilities = await self.bot.db.get_facilities(query)
 
         if self.bot.owner_id != interaction.user.id:
             removed_facilities: list[Facility] = []
@@ -289,16 +284,15 @@ class FacilityCog(commands.Cog):
         Args:
             ids (app_commands.Transform[tuple, IdTransformer]): List of facility ID's to remove with a delimiter of ',' or a space ' ' Ex. 1,3 4 8
         """
-        facilities = await self.bot.db.get_facility_ids(ids)
-        not_found_facilities = len(ids) - len(facilities)
+        is_owner = self.bot.owner_id == interaction.user.id
+        facilities, missing_ids = await self.bot.db.get_facility_ids(
+            ids, None if is_owner else interaction.guild_id
+        )
+        not_found_facilities = len(missing_ids)
 
         removed_facilities: list[Facility] = []
-        if self.bot.owner_id != interaction.user.id:
+        if not is_owner:
             for facility in facilities[:]:
-                if facility.guild_id != interaction.guild_id:
-                    facilities.remove(facility)
-                    removed_facilities.append(facility)
-                    continue
                 if not facility.can_modify(interaction):
                     if interaction.user.guild_permissions.administrator:
                         continue
@@ -343,8 +337,8 @@ class FacilityCog(commands.Cog):
     async def all(self, interaction: GuildInteraction):
         """Removes all facilities for the current guild"""
 
-        search_dict = {"guild_id == ?": interaction.guild_id}
-        facilities = await self.bot.db.get_facilities(search_dict)
+        query = FacilityQuery(guild_id=interaction.guild_id)
+        facilities = await self.bot.db.get_facilities(query)
 
         if not facilities:
             raise MessageError("No facilities found")
@@ -414,14 +408,11 @@ class FacilityCog(commands.Cog):
             ephemeral (bool, optional): Shows results to only you. Defaults to False.
         """
         embeds = facility.embeds()
-        if interaction.namespace.ephemeral is not None:
-            pass
-        else:
-            preference = await self.bot.db.ephemeral_preference(interaction.user.id)
-            if preference is None:
-                embeds.append(await ephemeral_info(self.bot))
-
-            ephemeral = preference or False
+        ephemeral, ephemeral_info_embed = await self.bot.preferences.resolve_ephemeral(
+            interaction, ephemeral
+        )
+        if ephemeral_info_embed:
+            embeds.append(ephemeral_info_embed)
 
         await interaction.response.send_message(embeds=embeds, ephemeral=ephemeral)
 
@@ -440,29 +431,19 @@ class FacilityCog(commands.Cog):
             ids (app_commands.Transform[tuple[int], IdTransformer]): List of facility ID's to view with a delimiter of ',' or a space ' ' Ex. 1,3 4 8
             ephemeral (bool): Show results to only you. Defaults to False
         """
-        facilities = await self.bot.db.get_facility_ids(ids)
+        facilities, _ = await self.bot.db.get_facility_ids(ids, interaction.guild_id)
         if not facilities:
             raise MessageError("No facilities found", ephemeral=True)
 
-        embeds = [
-            facility.embeds()
-            for facility in facilities
-            if facility.guild_id == interaction.guild_id
-        ]
-
-        ephemeral_info_embed = None
-        if interaction.namespace.ephemeral is not None:
-            pass
-        else:
-            preference = await self.bot.db.ephemeral_preference(interaction.user.id)
-            if preference is None:
-                ephemeral_info_embed = await ephemeral_info(self.bot)
+        pages = FacilityPageSource(facilities)
 
-            ephemeral = preference or False
+        ephemeral, ephemeral_info_embed = await self.bot.preferences.resolve_ephemeral(
+            interaction, ephemeral
+        )
 
         await Paginator(original_author=interaction.user).start(
             interaction,
-            pages=embeds,
+            pages=pages,
             ephemeral=ephemeral,
             one_time_message=ephemeral_info_embed,
         )
@@ -505,19 +486,15 @@ class FacilityCog(commands.Cog):
         """
         vehicle_service = vehicle[1] or vehicle_service
 
-        search_dict = {
-            name: value
-            for name, value in (
-                (" region == ? ", location and location.region),
-                (" item_services & ? ", item_service),
-                (" vehicle_services & ? ", vehicle_service),
-                (" author == ? ", creator and creator.id),
-                (" guild_id == ? ", interaction.guild_id),
-            )
-            if value
-        }
+        query = FacilityQuery(
+            guild_id=interaction.guild_id,
+            region=location and location.region,
+            author=creator and creator.id,
+            item_services=item_service,
+            vehicle_services=vehicle_service,
+        )
 
-        facility_list = await self.bot.db.get_facilities(search_dict)
+        facility_list = await self.bot.db.get_facilities(query)
 
         if not facility_list:
             raise MessageError("No facilities found", ephemeral=True)
@@ -525,24 +502,49 @@ class FacilityCog(commands.Cog):
         item_highlight = ItemServiceFlags(item_service)
         vehicle_highlight = VehicleServiceFlags(vehicle_service)
 
-        embeds = [
-            facility.embeds(item_highlight, vehicle_highlight, vehicle[0])
-            for facility in facility_list
-        ]
+        pages = FacilityPageSource(
+            facility_list, item_highlight, vehicle_highlight, vehicle[0]
+        )
 
-        ephemeral_info_embed = None
-        if interaction.namespace.ephemeral is not None:
-            pass
-        else:
-            preference = await self.bot.db.ephemeral_preference(interaction.user.id)
-            if preference is None:
-                ephemeral_info_embed = await ephemeral_info(self.bot)
+        ephemeral, ephemeral_info_embed = await self.bot.preferences.resolve_ephemeral(
+            interaction, ephemeral
+        )
 
-            ephemeral = preference or False
+        await Paginator(original_author=interaction.user).start(
+            interaction,
+            pages=pages,
+            ephemeral=ephemeral,
+            one_time_message=ephemeral_info_embed,
+        )
+
+    @app_commands.command()  # type: ignore[arg-type]
+    @app_commands.guild_only()
+    @app_commands.checks.cooldown(1, 4, key=lambda i: (i.guild_id, i.user.id))
+    async def search(
+        self,
+        interaction: GuildInteraction,
+        text: app_commands.Range[str, 1, 100],
+        ephemeral: bool = False,
+    ):
+        """Search facilities by name, description, maintainer or marker
+
+        Args:
+            text (str): Words to search for, matches the start of each word
+            ephemeral (bool): Show results to only you. Defaults to False.
+        """
+        facility_list = await self.bot.db.search_facilities(interaction.guild_id, text)
+        if not facility_list:
+            raise MessageError("No facilities found", ephemeral=True)
+
+        pages = FacilityPageSource(facility_list)
+
+        ephemeral, ephemeral_info_embed = await self.bot.preferences.resolve_ephemeral(
+            interaction, ephemeral
+        )
 
         await Paginator(original_author=interaction.user).start(
             interaction,
-            pages=embeds,
+            pages=pages,
             ephemeral=ephemeral,
             one_time_message=ephemeral_info_embed,
         )
@@ -557,9 +559,9 @@ class FacilityCog(commands.Cog):
             ephemeral (bool): Show results to only you. Defaults to False.
         """
 
-        search_dict = {" guild_id == ? ": interaction.guild_id}
+        query = FacilityQuery(guild_id=interaction.guild_id)
 
-        facility_list = await self.bot.db.get_facilities(search_dict)
+        facility_list = await self.bot.db.get_facilities(query)
 
         if not facility_list:
             raise MessageError("No facilities found", ephemeral=True)
@@ -568,15 +570,9 @@ class FacilityCog(commands.Cog):
             facility_list, interaction.guild, interaction.client
         )
 
-        ephemeral_info_embed = None
-        if interaction.namespace.ephemeral is not None:
-            pass
-        else:
-            preference = await self.bot.db.ephemeral_preference(interaction.user.id)
-            if preference is None:
-                ephemeral_info_embed = await ephemeral_info(self.bot)
-
-            ephemeral = preference or False
+        ephemeral, ephemeral_info_embed = await self.bot.preferences.resolve_ephemeral(
+            interaction, ephemeral
+        )
 
         if ephemeral_info_embed:
             finished_embeds.append(ephemeral_info_embed)
@@ -9,7 +9,8 @@ from discord import app_commands, Embed, Colour
 
 from .utils.context import GuildInteraction
 from .utils.errors import MessageError
-from .utils.embeds import ephemeral_info, HelpEmbed
+from .utils.embeds import HelpEmbed
+from .events import Events
 
 
 if TYPE_CHECKING:
@@ -67,15 +68,9 @@ class Misc(commands.Cog):
 
         embeds = [embed]
 
-        ephemeral_info_embed = None
-        if interaction.namespace.ephemeral is not None:
-            pass
-        else:
-            preference = await self.bot.db.ephemeral_preference(interaction.user.id)
-            if preference is None:
-                ephemeral_info_embed = await ephemeral_info(self.bot)
-
-            ephemeral = preference or False
+        ephemeral, ephemeral_info_embed = await self.bot.preferences.resolve_ephemeral(
+            interaction, ephemeral
+        )
 
         if ephemeral_info_embed:
             embeds.append(ephemeral_info_embed)
@@ -103,6 +98,10 @@ class Misc(commands.Cog):
         make_table=lambda rows,labels=None,centered=False:"".join(["┌"+"┬".join("─"*(max([*(len(str(o)) for o in c),len(str(labels[i])) if labels else 0])+2) for i,c in enumerate(list(zip(*rows))))+"┐\n",("│"+"│".join(f" {str(e).center(k)} "if centered else f" {str(e).ljust(k, ' ')} "for e,k in zip(labels,(max(len(str(o)) for o in [*c,l]) for c,l in zip(list(zip(*rows)),labels))))+"│\n├"+"┼".join("─"*(max([*(len(str(o)) for o in c),len(str(labels[i]))])+2 if labels else 0) for i,c in enumerate(list(zip(*rows))))+"┤\n"if labels else "")+"\n".join("│"+"│".join(f" {str(e).center(l)} "if centered else f" {str(e).ljust(l, ' ')} "for e,l in zip(r, ((max([*(len(str(o)) for o in c),len(str(labels[i])) if labels else 0])) for i,c in enumerate(list(zip(*rows)))))) + "│"for r in rows)+"\n└"+"┴".join("─"*(max([*(len(str(o)) for o in c),len(str(labels[i])) if labels else 0])+2) for i,c in enumerate(list(zip(*rows))))+"┘"])  # noqa
         # fmt: on
 
+        events = self.bot.get_cog("Events")
+        if events is not None and isinstance(events, Events):
+            await events.flush_command_stats()
+
         query = """
             SELECT name,
                   SUM(CASE WHEN guild_id = ? THEN run_count ELSE 0 END) AS guild_count,
@@ -125,15 +124,9 @@ class Misc(commands.Cog):
 
         embeds = [embed]
 
-        ephemeral_info_embed = None
-        if interaction.namespace.ephemeral is not None:
-            pass
-        else:
-            preference = await self.bot.db.ephemeral_preference(interaction.user.id)
-            if preference is None:
-                ephemeral_info_embed = await ephemeral_info(self.bot)
-
-            ephemeral = preference or False
+        ephemeral, ephemeral_info_embed = await self.bot.preferences.resolve_ephemeral(
+            interaction, ephemeral
+        )
 
         if ephemeral_info_embed:
             embeds.append(ephemeral_info_embed)
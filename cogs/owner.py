@@ -60,6 +60,58 @@ class Owner(commands.Cog, command_attrs={"hidden": True}):
         message = await ctx.send(embed=embed, view=view)
         view.message = message
 
+    @commands.command(aliases=["queries"])
+    async def query_stats(self, ctx: commands.Context, limit: int = 10):
+        """Statements that took the most time in total since startup"""
+        db = self.bot.db
+        top = db.stats.top(limit)
+        if not top:
+            embed = FeedbackEmbed("No queries recorded", FeedbackType.WARNING)
+            return await ctx.send(embed=embed)
+
+        entries = []
+        for query, stats in top:
+            entries.append(
+                f"{stats.total_time * 1000:.1f}ms total, {stats.count} runs, "
+                f"{stats.mean_time * 1000:.2f}ms avg, {stats.max_time * 1000:.1f}ms max\n"
+                f"{stats.wait_time * 1000:.1f}ms waiting, {stats.rows} rows, "
+                f"{stats.max_queue_depth} max queued\n"
+                f"{query[:300]}"
+            )
+
+        description = "\n\n".join(entries)[:3900]
+        embed = discord.Embed(
+            title=f"Top {len(top)} statements by total time",
+            description=f"```sql\n{description}\n```",
+            colour=discord.Colour.blue(),
+        )
+        embed.set_footer(text=f"{db.writer.queue_depth} writes queued")
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    async def query_stats_reset(self, ctx: commands.Context):
+        """Clears the recorded statement timings"""
+        self.bot.db.stats.reset()
+        await ctx.message.add_reaction("✅")
+
+    @commands.command(aliases=["outbound"])
+    async def outbound_stats(self, ctx: commands.Context):
+        """Queued and finished Discord API calls since startup"""
+        stats = self.bot.outbound.stats()
+        queued = "\n".join(
+            f"{priority.name.lower()}: {count}"
+            for priority, count in stats.queued.items()
+        )
+        embed = discord.Embed(title="Outbound queue", colour=discord.Colour.blue())
+        embed.add_field(name="Queued", value=queued)
+        embed.add_field(
+            name="Calls",
+            value=f"{stats.running} running\n{stats.completed} completed\n"
+            f"{stats.failed} failed\n{stats.retries} retries",
+        )
+        embed.set_footer(text=f"Longest wait {stats.max_wait:.2f}s")
+        await ctx.send(embed=embed)
+
 
 async def setup(bot: FacilityBot) -> None:
     await bot.add_cog(Owner(bot))
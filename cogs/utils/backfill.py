@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, NamedTuple, TYPE_CHECKING
+
+from discord import Forbidden, HTTPException
+
+
+if TYPE_CHECKING:
+    from bot import FacilityBot
+    from ..events import Events
+    from .facility import Facility
+
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillProgress(NamedTuple):
+    done: int
+    failed: int
+    total: int
+
+
+class ForumBackfill:
+    """Creates or updates the forum threads of many facilities with a bounded
+    amount of workers
+
+    Each new thread ID is written as soon as the thread exists, so a backfill
+    resumed after a restart doesn't create threads again. Thread creations all
+    use the forum's outbound route and so run one at a time, the workers overlap
+    them with the calls on each thread and the writes.
+
+    Args:
+        bot (FacilityBot): Bot instance
+        events (Events): Cog doing the forum sync
+        guild_id (int): Guild of the facilities
+        workers (int, optional): Facilities synced at once. Defaults to 4.
+        progress (Callable[[BackfillProgress], Awaitable[None]], optional): Called
+            with the progress at most every ``progress_interval`` seconds and once done
+        progress_interval (float, optional): Defaults to 3.
+    """
+
+    def __init__(
+        self,
+        bot: FacilityBot,
+        events: Events,
+        guild_id: int,
+        *,
+        workers: int = 4,
+        progress: Callable[[BackfillProgress], Awaitable[None]] | None = None,
+        progress_interval: float = 3.0,
+    ) -> None:
+        self.bot: FacilityBot = bot
+        self.events: Events = events
+        self.guild_id: int = guild_id
+        self.workers: int = workers
+        self.progress = progress
+        self.progress_interval: float = progress_interval
+
+        self.done: int = 0
+        self.failed: int = 0
+        self.total: int = 0
+        self._last_report: float = 0.0
+
+    @property
+    def state(self) -> BackfillProgress:
+        return BackfillProgress(self.done, self.failed, self.total)
+
+    async def run(self, facilities: list[Facility]) -> BackfillProgress:
+        """Syncs the forum thread of every facility
+
+        Args:
+            facilities (list[Facility]): Facilities to sync
+
+        Raises:
+            Forbidden: Missing permissions to manage the forum
+
+        Returns:
+            BackfillProgress: Facilities synced and failed
+        """
+        queue: asyncio.Queue[Facility] = asyncio.Queue()
+        for facility in facilities:
+            queue.put_nowait(facility)
+        self.total = len(facilities)
+
+        workers = [
+            asyncio.create_task(self._worker(queue))
+            for _ in range(min(self.workers, len(facilities)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        await self._report(force=True)
+        return self.state
+
+    async def _worker(self, queue: asyncio.Queue[Facility]) -> None:
+        while not queue.empty():
+            facility = queue.get_nowait()
+            try:
+                await self.events.handle_forum(facility, self.guild_id)
+            except Forbidden:
+                raise
+            except HTTPException:
+                self.failed += 1
+                logger.exception(
+                    "Failed creating forum thread of facility %r", facility.id_
+                )
+            else:
+                self.done += 1
+            await self._report()
+
+    async def _report(self, *, force: bool = False) -> None:
+        if self.progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+        try:
+            await self.progress(self.state)
+        except HTTPException:
+            # the interaction token expired, the backfill carries on regardless
+            logger.warning("Failed reporting forum backfill progress", exc_info=True)
+            self.progress = None
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import sys
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Iterable, TypeVar, TYPE_CHECKING
+
+from .flags import ItemServiceFlags
+
+
+if TYPE_CHECKING:
+    from .facility import Facility
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_FLAGS_SIZE = sys.getsizeof(ItemServiceFlags())
+
+
+def estimate_size(facility: Facility) -> int:
+    """Rough amount of bytes a facility keeps alive
+
+    Args:
+        facility (Facility): Facility to measure
+
+    Returns:
+        int: Estimated size in bytes
+    """
+    size = sys.getsizeof(facility) + 2 * _FLAGS_SIZE
+
+    for value in (
+        facility.name,
+        facility.description,
+        facility.region,
+        facility.coordinates,
+        facility.marker,
+        facility.maintainer,
+        facility.image_url,
+    ):
+        if value:
+            size += sys.getsizeof(value)
+    return size
+
+
+class FacilityCache:
+    """Facilities of recently used guilds, least recently used guilds are evicted
+    once the estimated size goes over ``max_bytes``
+
+    Only whole guilds are cached so a cached guild always has every facility,
+    updates for guilds that aren't cached are ignored.
+
+    Args:
+        max_bytes (int, optional): Estimated size to stay under. Defaults to 32MiB.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.max_bytes: int = max_bytes
+        self.size: int = 0
+        self._guilds: OrderedDict[int, dict[int, Facility]] = OrderedDict()
+        self._sizes: dict[int, int] = {}
+        self._versions: dict[int, int] = {}
+        self._epoch: int = 0
+
+    def __len__(self) -> int:
+        return len(self._guilds)
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._guilds
+
+    def version(self, guild_id: int) -> tuple[int, int]:
+        """Counters bumped on every change to a guild or the whole cache, used to
+        detect changes made while the guild was being loaded
+
+        Args:
+            guild_id (int): Guild ID
+
+        Returns:
+            tuple[int, int]: Current version
+        """
+        return self._epoch, self._versions.get(guild_id, 0)
+
+    def get(self, guild_id: int) -> list[Facility] | None:
+        """Gets every facility of a guild and marks it as recently used
+
+        Args:
+            guild_id (int): Guild ID
+
+        Returns:
+            list[Facility] | None: Facilities ordered by ID, None if the guild isn't cached
+        """
+        facilities = self._guilds.get(guild_id)
+        if facilities is None:
+            return None
+        self._guilds.move_to_end(guild_id)
+        return list(facilities.values())
+
+    def set(
+        self, guild_id: int, facilities: Iterable[Facility], version: tuple[int, int]
+    ) -> bool:
+        """Caches every facility of a guild
+
+        Args:
+            guild_id (int): Guild ID
+            facilities (Iterable[Facility]): Every facility in the guild
+            version (tuple[int, int]): :meth:`version` from before the facilities were loaded
+
+        Returns:
+            bool: Whether they were cached, False if the guild changed in the meantime
+        """
+        if version != self.version(guild_id):
+            return False
+
+        self._drop(guild_id)
+        mapped = {
+            facility.id_: facility
+            for facility in sorted(facilities, key=lambda facility: facility.id_)
+        }
+        guild_size = sum(map(estimate_size, mapped.values()))
+
+        self._guilds[guild_id] = mapped
+        self._sizes[guild_id] = guild_size
+        self.size += guild_size
+        self._evict()
+        return True
+
+    def add(self, facility: Facility) -> None:
+        """Adds or replaces a facility
+
+        Args:
+            facility (Facility): Created or modified facility
+        """
+        guild_id = facility.guild_id
+        self._versions[guild_id] = self._versions.get(guild_id, 0) + 1
+
+        facilities = self._guilds.get(guild_id)
+        if facilities is None or facility.id_ is None:
+            return
+
+        previous = facilities.get(facility.id_)
+        size_change = estimate_size(facility)
+        if previous is not None:
+            size_change -= estimate_size(previous)
+
+        facilities[facility.id_] = facility
+        if previous is None and next(reversed(facilities)) != facility.id_:
+            self._guilds[guild_id] = dict(sorted(facilities.items()))
+
+        self._sizes[guild_id] += size_change
+        self.size += size_change
+        self._evict()
+
+    def remove(self, facilities: Iterable[Facility]) -> None:
+        """Removes facilities
+
+        Args:
+            facilities (Iterable[Facility]): Removed facilities
+        """
+        for facility in facilities:
+            guild_id = facility.guild_id
+            self._versions[guild_id] = self._versions.get(guild_id, 0) + 1
+
+            cached = self._guilds.get(guild_id)
+            if cached is None:
+                continue
+            previous = cached.pop(facility.id_, None)
+            if previous is None:
+                continue
+
+            size = estimate_size(previous)
+            self._sizes[guild_id] -= size
+            self.size -= size
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._guilds.clear()
+        self._sizes.clear()
+        self.size = 0
+
+    def _drop(self, guild_id: int) -> None:
+        if self._guilds.pop(guild_id, None) is not None:
+            self.size -= self._sizes.pop(guild_id)
+
+    def _evict(self) -> None:
+        # always keep the most recently used guild, even if it's over the limit alone
+        while self.size > self.max_bytes and len(self._guilds) > 1:
+            guild_id = next(iter(self._guilds))
+            self._drop(guild_id)
+
+
+class TTLCache(Generic[K, V]):
+    """Small mapping where entries expire after ``ttl`` seconds and the least
+    recently used entry is evicted once there are ``max_size`` entries
+
+    Args:
+        max_size (int, optional): Maximum amount of entries. Defaults to 4096.
+        ttl (float, optional): Seconds an entry is valid for. Defaults to 600.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl: float = 600.0) -> None:
+        self.max_size: int = max_size
+        self.ttl: float = ttl
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """Gets a value and marks it as recently used
+
+        Args:
+            key (K): Key to look up
+            default (V, optional): Returned if the key is missing or expired
+
+        Returns:
+            V | None: Cached value
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import traceback
-import re
-from typing import TYPE_CHECKING
+from typing import AsyncIterable, TYPE_CHECKING
 from enum import Enum, auto
-from itertools import groupby
 
 from discord import Embed, Colour, Guild
 
@@ -70,112 +70,123 @@ class MaximumCharacters(LimitException):
     pass
 
 
-class EmbedPage(Embed):
-    def __init__(self, *args, **kwargs):
-        super().__init__(colour=Colour.green(), *args, **kwargs)
+class _ListField:
+    """A region field of the facility list, the value is only joined when the
+    embed is built
+
+    Args:
+        region (str): Region of the entries
+        entry (str): First entry
+        continued (bool): If the region continues from a previous field
+    """
+
+    __slots__ = ("region", "continued", "entries", "count", "lines", "length", "inline")
+
+    def __init__(self, region: str, entry: str, continued: bool) -> None:
+        self.region: str = region
+        self.continued: bool = continued
+        self.entries: list[str] = [entry]
+        # shown in the name, only counted once a second entry is added
+        self.count: int = 1
+        self.lines: int = len(entry.splitlines())
+        self.length: int = len(entry)
+        self.inline: bool = False
+
+    @property
+    def name(self) -> str:
+        if self.continued:
+            return f"{self.region} ({self.count}) (cont.)"
+        return f"{self.region} ({self.count})"
+
+    def name_length(self, count: int) -> int:
+        return len(self.region) + len(str(count)) + (11 if self.continued else 3)
+
+    @property
+    def value(self) -> str:
+        return "\n".join(self.entries)
+
+
+class EmbedPage:
+    """One embed of the facility list, sizes are tracked as entries are added so
+    limits can be checked without measuring the embed
+
+    Args:
+        title (str, optional): Title of the embed
+        description (str, optional): Description of the embed
+    """
+
+    def __init__(self, title: str | None = None, description: str | None = None):
+        self.title: str | None = title
+        self.description: str | None = description
+        self.fields: list[_ListField] = []
+        self.length: int = len(title or "") + len(description or "")
 
         self.mapped_index: dict[str, int] = {}
         self.count: dict[str, int] = {}
 
-    def _new_field_name(self, *, region: str, continued: bool):
-        return f"{region} (1) (cont.)" if continued else f"{region} (1)"
+    def _limit(self, exc_type: type[LimitException], region: str) -> LimitException:
+        return exc_type(continued=bool(self.count.get(region, 0)))
 
     def add_entry(self, region: str, entry: str, continued: bool = False):
         try:
             index = self.mapped_index[region]
         except KeyError:
-            field_name = self._new_field_name(region=region, continued=continued)
-            self.add_field(region=region, name=field_name, value=entry)
-        else:
-            field = self.fields[index]
-
-            updated_value = f"{field.value or ''}\n{entry}"
-            facility_count = str(len(updated_value.splitlines()))
-
-            number_start, number_end = re.search(r"\d+", field.name or "").span()
-
-            updated_name = (
-                field.name[:number_start] + facility_count + field.name[number_end:]
-            )
-
-            if len(updated_value) > 1024:
-                field_name = self._new_field_name(region=region, continued=True)
-                self.add_field(region=region, name=field_name, value=entry)
-            else:
-                self.set_field_at(
-                    index,
-                    region=region,
-                    name=updated_name,
-                    value=updated_value,
-                )
-
-    def add_field(
-        self,
-        *,
-        region: str,
-        name: str,
-        value: str,
-        inline: bool = False,
-    ):
-        try:
-            if self.fields == 25:
-                raise MaximumFields()
-            if len(self) + len(name) + len(value) > 6000:
-                raise MaximumCharacters()
-        except LimitException as exc:
-            count = self.count.get(region, 0)
-            exc.continued = bool(count)
-            raise exc
+            self.add_field(region, entry, continued)
+            return
 
-        super().add_field(name=name, value=value, inline=inline)
+        field = self.fields[index]
+        value_length = field.length + 1 + len(entry)
+        if value_length > 1024:
+            self.add_field(region, entry, True)
+            return
+
+        lines = field.lines + len(entry.splitlines())
+        growth = (
+            field.name_length(lines)
+            - field.name_length(field.count)
+            + value_length
+            - field.length
+        )
+        if self.length + growth > 6000:
+            raise self._limit(MaximumCharacters, region)
 
-        try:
-            self.count[region] += 1
-        except KeyError:
-            self.count[region] = 1
+        field.entries.append(entry)
+        field.count = field.lines = lines
+        field.length = value_length
+        field.inline = True
+        self.length += growth
 
-        index = len(self.fields) - 1
-        self.mapped_index[region] = index
+    def add_field(self, region: str, entry: str, continued: bool):
+        if len(self.fields) == 25:
+            raise self._limit(MaximumFields, region)
 
-    def set_field_at(
-        self,
-        index: int,
-        *,
-        region: str,
-        name: str,
-        value: str,
-        inline: bool = True,
-    ):
-        field = self.fields[index]
-        embed_length = len(self) - len(field.name) - len(field.value)
+        field = _ListField(region, entry, continued)
+        field_length = field.name_length(field.count) + field.length
+        if self.length + field_length > 6000:
+            raise self._limit(MaximumCharacters, region)
 
-        try:
-            if embed_length + len(name) + len(value) > 6000:
-                raise MaximumCharacters()
-        except LimitException as exc:
-            count = self.count.get(region, 0)
-            exc.continued = bool(count)
-            raise exc
+        self.fields.append(field)
+        self.length += field_length
 
-        return super().set_field_at(index, name=name, value=value, inline=inline)
+        try:
+            self.count[region] += 1
+        except KeyError:
+            self.count[region] = 1
 
-    def fix_wrapping(self):
-        for index, field in enumerate(self.fields):
-            value = field.value or ""
-            entries = value.splitlines()
+        self.mapped_index[region] = len(self.fields) - 1
 
-            if any(len(entry) > 30 for entry in entries):
-                super().set_field_at(
-                    index,
-                    name=field.name,
-                    value=field.value,
-                    inline=False,
-                )
+    def to_embed(self) -> Embed:
+        embed = Embed(
+            colour=Colour.green(), title=self.title, description=self.description
+        )
+        for field in self.fields:
+            embed.add_field(name=field.name, value=field.value, inline=field.inline)
+        return embed
 
 
 class Paginator:
     def __init__(self) -> None:
-        self.embeds: list[EmbedPage] = []
+        self.pages: list[EmbedPage] = []
 
     @classmethod
     async def create(cls, guild_name: str, total_facilities: int, bot: FacilityBot):
@@ -189,51 +200,80 @@ class Paginator:
         return pnr
 
     def _new_embed(self, *args, **kwargs) -> EmbedPage:
-        embed = EmbedPage(*args, **kwargs)
-        self.embeds.append(embed)
-        return embed
+        page = EmbedPage(*args, **kwargs)
+        self.pages.append(page)
+        return page
 
     def add_entry(self, region: str, entry: str):
-        embed = self.embeds[-1]
+        page = self.pages[-1]
         try:
-            embed.add_entry(region, entry)
+            page.add_entry(region, entry)
         except LimitException as exc:
-            new_embed = self._new_embed()
-            new_embed.add_entry(region, entry, exc.continued)
+            new_page = self._new_embed()
+            new_page.add_entry(region, entry, exc.continued)
+
+    @property
+    def embeds(self) -> list[Embed]:
+        """Builds the embeds, only access once all entries are added"""
+        return [page.to_embed() for page in self.pages]
+
+
+def _list_entry(facility: Facility) -> str:
+    if facility.thread_id:
+        return f"{facility.id_} | <#{facility.thread_id}>"
+    return f"{facility.id_} | {facility.name.strip()} | {facility.marker}"
 
 
 async def create_list(
-    facility_list: list[Facility], guild: Guild, bot: FacilityBot
+    facility_list: list[Facility] | AsyncIterable[Facility],
+    guild: Guild,
+    bot: FacilityBot,
+    total: int | None = None,
 ) -> list[Embed]:
     """Generates embeds to list short form facilities
 
     Args:
-        facility_list (list[Facility]): Facilities to generate list from
+        facility_list (list[Facility] | AsyncIterable[Facility]): Facilities to generate list from, async iterables (e.g. :meth:`Database.iter_facilities`) must already be ordered by region
         guild (Guild): Guild where the list is from
+        total (int, optional): Amount of facilities, required for async iterables
 
     Returns:
         list[Embed]: List of embeds
     """
-    paginator = await Paginator.create(guild.name, len(facility_list), bot)
-
-    facility_list.sort(key=lambda facility: facility.region)
-    facility_regions = groupby(facility_list, key=lambda facility: facility.region)
-
-    for region, facilities in facility_regions:
-        formatted_list = []
-        for facility in facilities:
-            if facility.thread_id:
-                formatted_list.append(f"{facility.id_} | <#{facility.thread_id}>")
-            else:
-                formatted_list.append(
-                    f"{facility.id_} | {facility.name.strip()} | {facility.marker}"
-                )
-        for entry in formatted_list:
-            paginator.add_entry(region, entry)
+    if isinstance(facility_list, list):
+        total = len(facility_list)
+    elif total is None:
+        raise TypeError("total is required when streaming facilities")
+
+    paginator = await Paginator.create(guild.name, total, bot)
+
+    if isinstance(facility_list, list):
+        facility_list.sort(key=lambda facility: facility.region)
+        for facility in facility_list:
+            paginator.add_entry(facility.region, _list_entry(facility))
+    else:
+        async for facility in facility_list:
+            paginator.add_entry(facility.region, _list_entry(facility))
 
     return paginator.embeds
 
 
+def content_hash(embed: Embed) -> int:
+    """Hashes what an embed shows, unlike :func:`hash` it's the same across
+    restarts so it can be stored
+
+    Args:
+        embed (Embed): Embed to hash
+
+    Returns:
+        int: 63 bit hash, fits in a signed sqlite INTEGER
+    """
+    data = json.dumps(embed.to_dict(), sort_keys=True, separators=(",", ":"))
+    digest = hashlib.blake2b(data.encode(), digest_size=8).digest()
+    # larger values would be stored as REAL and come back as "1.8e+19"
+    return int.from_bytes(digest, "big") & (1 << 63) - 1
+
+
 async def ephemeral_info(bot: FacilityBot) -> Embed:
     command = await bot.tree.get_or_fetch_app_command("toggle_ephemeral")
     return Embed(
@@ -253,6 +293,7 @@ class HelpEmbed(Embed):
         view_cmd = await tree.get_or_fetch_app_command("view")
         facility_cmd = await tree.get_or_fetch_app_command("facility")
         locate_cmd = await tree.get_or_fetch_app_command("locate")
+        search_cmd = await tree.get_or_fetch_app_command("search")
         list_cmd = await tree.get_or_fetch_app_command("list")
         remove_ids_cmd = await tree.get_or_fetch_app_command("remove ids")
         remove_ids_cmd = await tree.get_or_fetch_app_command("remove ids")
@@ -274,6 +315,7 @@ class HelpEmbed(Embed):
             value=f"""{view_cmd and view_cmd.mention} (Allows multiple IDs)
                       {facility_cmd and facility_cmd.mention} (Displays one facility)
                       {locate_cmd and locate_cmd.mention} (Finds a facility based on search parameters)
+                      {search_cmd and search_cmd.mention} (Searches names, descriptions, maintainers and markers)
                       {list_cmd and list_cmd.mention} (Shows a list of all facilities by region)""",
             inline=False,
         )
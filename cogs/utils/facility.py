@@ -1,14 +1,51 @@
-from typing import Optional
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Callable, NamedTuple, Optional, TYPE_CHECKING
 
 import discord
 
-from .flags import ItemServiceFlags, VehicleServiceFlags
+from .flags import (
+    FacilityFlags,
+    ItemServiceFlags,
+    VehicleServiceFlags,
+    vehicle_flag,
+)
 from .ansi import Colour, ANSIColour
 
 
+if TYPE_CHECKING:
+    from sqlite3 import Row
+
+
+# columns that can change after a facility is created, tracked for partial updates
+TRACKED_FIELDS: tuple[str, ...] = (
+    "name",
+    "description",
+    "maintainer",
+    "item_services",
+    "vehicle_services",
+    "image_url",
+    "thread_id",
+)
+_TRACKED = frozenset(TRACKED_FIELDS)
+_set = object.__setattr__
+
+
+def _comparable(value: Any) -> Any:
+    # flags compare by identity, compare their values instead
+    if isinstance(value, FacilityFlags):
+        return value.value
+    return value
+
+
 class Facility:
     """Represents a facility
 
+    Changes to :data:`TRACKED_FIELDS` are recorded, the first assignment to a
+    tracked field keeps its original value so :meth:`dirty_fields` knows which
+    columns need writing. Untouched facilities carry no tracking state.
+
     Args:
         id_ (int, optional): ID
         name (str): Name
@@ -26,6 +63,40 @@ class Facility:
         thread_id (int): Thread ID where this facility is publicly shown
     """
 
+    __slots__ = (
+        "id_",
+        "name",
+        "description",
+        "region",
+        "coordinates",
+        "marker",
+        "maintainer",
+        "author",
+        "item_services",
+        "vehicle_services",
+        "creation_time",
+        "guild_id",
+        "image_url",
+        "thread_id",
+        "_original",
+    )
+
+    id_: Optional[int]
+    name: str
+    description: str
+    region: str
+    coordinates: Optional[str]
+    marker: str
+    maintainer: str
+    author: int
+    item_services: ItemServiceFlags
+    vehicle_services: VehicleServiceFlags
+    creation_time: Optional[int]
+    guild_id: int
+    image_url: str
+    thread_id: Optional[int]
+    _original: Optional[dict[str, Any]]
+
     def __init__(
         self,
         *,
@@ -35,70 +106,119 @@ class Facility:
         maintainer: str,
         author: int,
         guild_id: int,
-        **options,
+        id_: Optional[int] = None,
+        description: str = "",
+        coordinates: Optional[str] = None,
+        item_services: Optional[ItemServiceFlags] = None,
+        vehicle_services: Optional[VehicleServiceFlags] = None,
+        creation_time: Optional[int] = None,
+        image_url: str = "",
+        thread_id: Optional[int] = None,
     ) -> None:
-        self.id_: Optional[int] = options.pop("id_", None)
-        self.name: str = name
-        self.description: str = options.pop("description", "")
-        self.region: str = region
-        self.coordinates: Optional[str] = options.pop("coordinates", None)
-        self.marker: str = marker
-        self.maintainer: str = maintainer
-        self.author: int = author
-
-        item_services: ItemServiceFlags = options.pop(
-            "item_services", ItemServiceFlags()
-        )
-        if not isinstance(item_services, ItemServiceFlags):
+        if item_services is None:
+            item_services = ItemServiceFlags()
+        elif not isinstance(item_services, ItemServiceFlags):
             raise TypeError(
                 f"item_services must be ItemServiceFlags not {type(item_services)}"
             )
-        self.item_services = item_services
 
-        vehicle_services: VehicleServiceFlags = options.pop(
-            "vehicle_services", VehicleServiceFlags()
-        )
-        if not isinstance(vehicle_services, VehicleServiceFlags):
+        if vehicle_services is None:
+            vehicle_services = VehicleServiceFlags()
+        elif not isinstance(vehicle_services, VehicleServiceFlags):
             raise TypeError(
                 f"vehicle_services must be VehicleServiceFlags not {type(vehicle_services)}"
             )
-        self.vehicle_services = vehicle_services
-
-        self.creation_time: Optional[int] = options.pop("creation_time", None)
-        self.image_url: str = options.pop("image_url", "")
-        self.guild_id: int = guild_id
-        self.initial_hash: int = self.__current_hash()
-        self.thread_id: Optional[int] = options.pop("thread_id", None)
-
-    def __current_hash(self) -> int:
-        return hash(
-            (
-                self.id_,
-                self.name,
-                self.description,
-                self.region,
-                self.coordinates,
-                self.marker,
-                self.maintainer,
-                self.author,
-                self.item_services.value,
-                self.vehicle_services.value,
-                self.image_url,
-            )
-        )
+
+        _set(self, "_original", None)
+        _set(self, "id_", id_)
+        _set(self, "name", name)
+        _set(self, "description", description)
+        _set(self, "region", region)
+        _set(self, "coordinates", coordinates)
+        _set(self, "marker", marker)
+        _set(self, "maintainer", maintainer)
+        _set(self, "author", author)
+        _set(self, "item_services", item_services)
+        _set(self, "vehicle_services", vehicle_services)
+        _set(self, "creation_time", creation_time)
+        _set(self, "guild_id", guild_id)
+        _set(self, "image_url", image_url)
+        _set(self, "thread_id", thread_id)
+
+    @classmethod
+    def from_row(cls, row: Row) -> Facility:
+        """Creates a facility from a row of the facilities table without
+        validating it
+
+        Args:
+            row (Row): Row with every column of the facilities table
+
+        Returns:
+            Facility: Facility with no changes
+        """
+        self = cls.__new__(cls)
+        _set(self, "_original", None)
+        for setter, value in zip(_row_setters(tuple(row.keys())), row):
+            setter(self, value)
+        return self
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in _TRACKED:
+            original = self._original
+            if original is None:
+                original = {}
+                _set(self, "_original", original)
+            if name not in original:
+                original[name] = _comparable(getattr(self, name))
+        _set(self, name, value)
+
+    def __copy__(self) -> Facility:
+        new = self.__class__.__new__(self.__class__)
+        for name in _COLUMNS:
+            _set(new, name, getattr(self, name))
+        _set(new, "_original", self._original and self._original.copy())
+        return new
 
     def __repr__(self) -> str:
         return (
             f"<Facility id={self.id_} author_id={self.author} guild_id={self.guild_id}>"
         )
 
+    def dirty_fields(self) -> tuple[str, ...]:
+        """Names of the tracked columns changed since creation or :meth:`mark_clean`
+
+        Returns:
+            tuple[str, ...]: Changed fields in :data:`TRACKED_FIELDS` order
+        """
+        original = self._original
+        if not original:
+            return ()
+        return tuple(
+            name
+            for name in TRACKED_FIELDS
+            if name in original and original[name] != _comparable(getattr(self, name))
+        )
+
+    def mark_clean(self, *fields: str) -> None:
+        """Treats the current values as unchanged, call after they are written
+
+        Args:
+            *fields (str): Fields to mark, every field if none are passed
+        """
+        original = self._original
+        if not fields or original is None:
+            _set(self, "_original", None)
+            return
+        for name in fields:
+            original.pop(name, None)
+
     def changed(self) -> bool:
         """Determine whether the facility has changed from initial instance
 
         Returns:
             bool: If facility has changed
         """
-        return self.initial_hash != self.__current_hash()
+        return bool(self.dirty_fields())
 
     def embeds(
         self,
@@ -108,128 +228,35 @@ class Facility:
     ) -> list[discord.Embed]:
         """Generates a list of embeds for viewing the facility
 
+        Renders are cached on the facility's values and the highlights, the
+        returned embeds are shared between calls and must not be modified.
+
         Returns:
             list[discord.Embed]: Embeds representing the current state of facility
         """
-        embeds: list[discord.Embed] = []
-
-        facility_location = f"> Region : {self.region}\n> Marker : {self.marker}\n"
-        if self.coordinates:
-            facility_location += f"> Coordinates : {self.coordinates}\n"
-
-        creation_info = (
-            f"> Maintainer : {self.maintainer}\n> Author : <@{self.author}>\n"
+        state = (
+            self.id_,
+            self.name,
+            self.description,
+            self.region,
+            self.coordinates,
+            self.marker,
+            self.maintainer,
+            self.author,
+            self.item_services.value,
+            self.vehicle_services.value,
+            self.creation_time,
+            self.image_url,
+            self.thread_id,
         )
-        if self.creation_time:
-            creation_info += f"> Created : <t:{self.creation_time}:R>\n"
-        if self.id_:
-            creation_info += f"> ID : {self.id_}\n"
-        if self.thread_id:
-            creation_info += f"> Thread : <#{self.thread_id}>\n"
-
-        embed = discord.Embed(
-            title=self.name, description=self.description, color=0x54A24A
-        )
-        if self.image_url:
-            image_embed = discord.Embed(
-                type="image", colour=discord.Colour.dark_embed()
-            ).set_image(url=self.image_url)
-            embeds.append(image_embed)
-        embed.add_field(name="Location:", value=facility_location)
-        # embed.add_field(name="Maintainer:", value=self.maintainer)
-        embed.add_field(name="Info:", value=creation_info, inline=False)
-
-        embed.set_footer(text="Source Code: https://github.com/thecuz1/FacilityLocator")
-
-        start = "```ansi\n"
-        end = "\n```"
-
-        if self.item_services:
-            service_list: list[str] = []
-
-            for name, flag in self.item_services.MAPPED_FLAGS.items():
-                if getattr(self.item_services, name) is False:
-                    continue
-
-                if getattr(item_service_highlight, name) is True:
-                    service_list.append(
-                        f"\u001b[0;34m> {flag.display_name}\u001b[0;32m"
-                    )
-                else:
-                    service_list.append(flag.display_name)
-
-            services = "\n".join(service_list)
-            embed.add_field(
-                name="Item Services:",
-                value=f"{start}{ANSIColour(text_colour=Colour.GREEN)}{services}{end}",
-            )
-
-        if self.vehicle_services:
-            service_list: list[str] = []
-            vehicles: list[list[str]] = [[]]
-
-            for name, flag in self.vehicle_services.MAPPED_FLAGS.items():
-                if getattr(self.vehicle_services, name) is False:
-                    continue
-
-                if getattr(vehicle_service_highlight, name) is True:
-                    service_list.append(
-                        f"{ANSIColour(bold=True, text_colour=Colour.BLUE)}> {flag.ansi}{flag.display_name}"
-                    )
-                else:
-                    service_list.append(f"{flag.ansi}{flag.display_name}")
-
-                if flag.produces:
-                    vehicle_list = list(flag.produces)
-                    vehicle_list[0] = f"{flag.ansi}{vehicle_list[0]}"
-
-                    if vehicle_highlight:
-                        for i, k in enumerate(vehicle_list):
-                            if vehicle_highlight in k:
-                                vehicle_list[i] = (
-                                    f"{ANSIColour(bold=True, text_colour=Colour.BLUE)}> {flag.ansi}{k}"
-                                )
-                                break
-
-                    length_vehicle_list = 0
-                    for k in vehicle_list:
-                        length_vehicle_list += len(k)
-                    length_vehicle_list += len(vehicle_list) - 1
-
-                    length_vehicles = 0
-                    for k in vehicles[-1]:
-                        length_vehicles += len(k)
-                    length_vehicles += len(vehicles[-1]) - 1
-
-                    if length_vehicle_list + length_vehicles > 860:
-                        vehicles.append(vehicle_list)
-                    else:
-                        vehicles[-1].extend(vehicle_list)
-
-            services = "\n".join(service_list)
-
-            embed.add_field(
-                name="Vehicle Services:",
-                value=f"{start}{services}{end}",
-                inline=True,
+        return list(
+            _render_embeds(
+                state,
+                item_service_highlight.value,
+                vehicle_service_highlight.value,
+                vehicle_highlight,
             )
-
-            if vehicles[0]:
-                vehicles[0].insert(
-                    0,
-                    f"{ANSIColour(bold=True, underline=True)}List generated from vehicle services and doesn't take into account resources to build listed vehicles.",
-                )
-                for index, vehicle_list in enumerate(vehicles):
-                    joined_vehicles = "\n".join(vehicle_list)
-                    name = "Vehicles:" if index == 0 else "Vehicles (Cont.):"
-                    embed.add_field(
-                        name=name,
-                        value=f"{start}{joined_vehicles}{end}",
-                        inline=False,
-                    )
-
-        embeds.append(embed)
-        return embeds
+        )
 
     def can_modify(self, interaction: discord.Interaction) -> bool:
         """Returns true if the passed interaction has the ability to modify the facility
@@ -244,3 +271,196 @@ class Facility:
 
     def has_one_service(self) -> bool:
         return bool(self.item_services) or bool(self.vehicle_services)
+
+
+_COLUMNS: tuple[str, ...] = Facility.__slots__[:-1]
+
+
+@lru_cache(maxsize=8)
+def _row_setters(keys: tuple[str, ...]) -> tuple[Callable[[Facility, Any], None], ...]:
+    # slot descriptors in the order of a row's columns, skips __setattr__
+    return tuple(getattr(Facility, key).__set__ for key in keys)
+
+
+@lru_cache(maxsize=1024)
+def _render_embeds(
+    state: tuple,
+    item_service_highlight: int,
+    vehicle_service_highlight: int,
+    vehicle_highlight: str,
+) -> tuple[discord.Embed, ...]:
+    (
+        id_,
+        name,
+        description,
+        region,
+        coordinates,
+        marker,
+        maintainer,
+        author,
+        item_services,
+        vehicle_services,
+        creation_time,
+        image_url,
+        thread_id,
+    ) = state
+    embeds: list[discord.Embed] = []
+
+    facility_location = f"> Region : {region}\n> Marker : {marker}\n"
+    if coordinates:
+        facility_location += f"> Coordinates : {coordinates}\n"
+
+    creation_info = f"> Maintainer : {maintainer}\n> Author : <@{author}>\n"
+    if creation_time:
+        creation_info += f"> Created : <t:{creation_time}:R>\n"
+    if id_:
+        creation_info += f"> ID : {id_}\n"
+    if thread_id:
+        creation_info += f"> Thread : <#{thread_id}>\n"
+
+    embed = discord.Embed(title=name, description=description, color=0x54A24A)
+    if image_url:
+        image_embed = discord.Embed(
+            type="image", colour=discord.Colour.dark_embed()
+        ).set_image(url=image_url)
+        embeds.append(image_embed)
+    embed.add_field(name="Location:", value=facility_location)
+    # embed.add_field(name="Maintainer:", value=self.maintainer)
+    embed.add_field(name="Info:", value=creation_info, inline=False)
+
+    embed.set_footer(text="Source Code: https://github.com/thecuz1/FacilityLocator")
+
+    if item_services:
+        embed.add_field(
+            name="Item Services:",
+            value=_item_services_text(item_services, item_service_highlight),
+        )
+
+    if vehicle_services:
+        services, vehicle_texts = _vehicle_services_text(
+            vehicle_services, vehicle_service_highlight, vehicle_highlight
+        )
+        embed.add_field(
+            name="Vehicle Services:",
+            value=services,
+            inline=True,
+        )
+
+        for index, vehicle_text in enumerate(vehicle_texts):
+            name = "Vehicles:" if index == 0 else "Vehicles (Cont.):"
+            embed.add_field(
+                name=name,
+                value=vehicle_text,
+                inline=False,
+            )
+
+    embeds.append(embed)
+    return tuple(embeds)
+
+
+_START = "```ansi\n"
+_END = "\n```"
+_ITEM_START = f"{_START}{ANSIColour(text_colour=Colour.GREEN)}"
+_HIGHLIGHT = str(ANSIColour(bold=True, text_colour=Colour.BLUE))
+_VEHICLES_NOTICE = f"{ANSIColour(bold=True, underline=True)}List generated from vehicle services and doesn't take into account resources to build listed vehicles."
+# most characters of vehicle lines in one field before continuing in another
+_VEHICLES_FIELD_LENGTH = 860
+
+
+class _VehicleLines(NamedTuple):
+    service: str
+    highlighted_service: str
+    vehicles: tuple[str, ...]
+    # sum of line lengths plus the newlines joining them
+    length: int
+
+
+# formatted lines of every flag, built once so renders only look them up
+_ITEM_LINES: dict[int, tuple[str, str]] = {
+    flag.flag_value: (
+        flag.display_name,
+        f"\u001b[0;34m> {flag.display_name}\u001b[0;32m",
+    )
+    for flag in ItemServiceFlags.MAPPED_FLAGS.values()
+}
+
+
+def _vehicle_lines(flag: vehicle_flag) -> _VehicleLines:
+    vehicles = list(flag.produces)
+    if vehicles:
+        vehicles[0] = f"{flag.ansi}{vehicles[0]}"
+    return _VehicleLines(
+        f"{flag.ansi}{flag.display_name}",
+        f"{_HIGHLIGHT}> {flag.ansi}{flag.display_name}",
+        tuple(vehicles),
+        sum(map(len, vehicles)) + len(vehicles) - 1,
+    )
+
+
+_VEHICLE_LINES: dict[int, _VehicleLines] = {
+    flag.flag_value: _vehicle_lines(flag)
+    for flag in VehicleServiceFlags.MAPPED_FLAGS.values()
+}
+
+
+@lru_cache(maxsize=512)
+def _item_services_text(value: int, highlight: int) -> str:
+    service_list: list[str] = []
+    for flag in ItemServiceFlags(value).set_flags():
+        flag_value = flag.flag_value
+        service_list.append(_ITEM_LINES[flag_value][highlight & flag_value != 0])
+
+    services = "\n".join(service_list)
+    return f"{_ITEM_START}{services}{_END}"
+
+
+@lru_cache(maxsize=512)
+def _vehicle_services_text(
+    value: int, highlight: int, vehicle_highlight: str
+) -> tuple[str, tuple[str, ...]]:
+    """Vehicle services field and the vehicle fields split to fit in embeds"""
+    service_list: list[str] = []
+    vehicles: list[list[str]] = [[]]
+    # length of the last field's lines joined, -1 while it's empty
+    field_length = -1
+
+    for flag in VehicleServiceFlags(value).set_flags():
+        flag_value = flag.flag_value
+        lines = _VEHICLE_LINES[flag_value]
+        if highlight & flag_value:
+            service_list.append(lines.highlighted_service)
+        else:
+            service_list.append(lines.service)
+
+        if not lines.vehicles:
+            continue
+
+        vehicle_list = lines.vehicles
+        length = lines.length
+        if vehicle_highlight:
+            for i, line in enumerate(vehicle_list):
+                if vehicle_highlight in line:
+                    highlighted = f"{_HIGHLIGHT}> {flag.ansi}{line}"
+                    vehicle_list = (
+                        vehicle_list[:i] + (highlighted,) + vehicle_list[i + 1 :]
+                    )
+                    length += len(highlighted) - len(line)
+                    break
+
+        if length + field_length > _VEHICLES_FIELD_LENGTH:
+            vehicles.append(list(vehicle_list))
+            field_length = length
+        else:
+            vehicles[-1].extend(vehicle_list)
+            field_length += length + 1
+
+    services = "\n".join(service_list)
+
+    vehicle_texts: list[str] = []
+    if vehicles[0]:
+        vehicles[0].insert(0, _VEHICLES_NOTICE)
+        for vehicle_list in vehicles:
+            joined_vehicles = "\n".join(vehicle_list)
+            vehicle_texts.append(f"{_START}{joined_vehicles}{_END}")
+
+    return f"{_START}{services}{_END}", tuple(vehicle_texts)
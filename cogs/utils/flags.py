@@ -62,11 +62,19 @@ class FlagsMeta(Type):
     def __new__(
         cls: Type[FF], name: str, bases: tuple[type, ...], namespace: dict[str, Any]
     ):
-        namespace["MAPPED_FLAGS"] = {
+        namespace["MAPPED_FLAGS"] = mapped_flags = {
             var_name: value
             for var_name, value in namespace.items()
             if isinstance(value, flag)
         }
+        # flag value -> (declaration index, flag), used to walk only set bits
+        namespace["_FLAG_INDEX"] = {
+            value.flag_value: (index, value)
+            for index, value in enumerate(mapped_flags.values())
+        }
+        namespace["_FLAG_ORDER"] = tuple(
+            (value.flag_value, value) for value in mapped_flags.values()
+        )
 
         return super().__new__(cls, name, bases, namespace)
 
@@ -83,6 +91,8 @@ class FlagsMeta(Type):
 
 class FacilityFlags(metaclass=FlagsMeta):
     MAPPED_FLAGS: ClassVar[dict[str, flag]]
+    _FLAG_INDEX: ClassVar[dict[int, tuple[int, flag]]]
+    _FLAG_ORDER: ClassVar[tuple[tuple[int, flag], ...]]
 
     __slots__ = ("value",)
 
@@ -127,6 +137,32 @@ class FacilityFlags(metaclass=FlagsMeta):
         else:
             raise TypeError("Value must be bool")
 
+    def set_flags(self) -> list[flag]:
+        """Flags that are set in declaration order
+
+        Returns:
+            list[flag]: Set flags
+        """
+        value = self.value
+        if value.bit_count() > 8:
+            # a single filtering pass beats walking and sorting many set bits
+            return [
+                flag_descriptor
+                for flag_value, flag_descriptor in self._FLAG_ORDER
+                if value & flag_value == flag_value
+            ]
+
+        flag_index = self._FLAG_INDEX
+        found: list[tuple[int, flag]] = []
+        while value:
+            bit = value & -value
+            value ^= bit
+            entry = flag_index.get(bit)
+            if entry is not None:
+                found.append(entry)
+        found.sort(key=lambda entry: entry[0])
+        return [flag_descriptor for _, flag_descriptor in found]
+
     def select_options(self) -> list[SelectOption]:
         return [
             SelectOption(
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from time import perf_counter
+
+
+slow_query_logger = logging.getLogger("slow_query")
+
+
+@lru_cache(maxsize=512)
+def normalize_sql(query: str) -> str:
+    """Collapses whitespace so the same statement formatted differently is
+    aggregated together
+
+    Args:
+        query (str): SQL statement
+
+    Returns:
+        str: Statement on a single line
+    """
+    return " ".join(query.split())
+
+
+class StatementStats:
+    """Totals for one normalized statement"""
+
+    __slots__ = (
+        "count",
+        "total_time",
+        "max_time",
+        "rows",
+        "wait_time",
+        "max_queue_depth",
+    )
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total_time: float = 0.0
+        self.max_time: float = 0.0
+        self.rows: int = 0
+        self.wait_time: float = 0.0
+        self.max_queue_depth: int = 0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.count if self.count else 0.0
+
+
+class QueryTimer:
+    """Times a single statement from the moment it wants a connection
+
+    Args:
+        stats (QueryStats): Where to record the statement
+        query (str): Statement being run
+    """
+
+    __slots__ = ("stats", "query", "started", "wait_time", "queue_depth")
+
+    def __init__(self, stats: QueryStats, query: str) -> None:
+        self.stats: QueryStats = stats
+        self.query: str = query
+        self.started: float = perf_counter()
+        self.wait_time: float = 0.0
+        self.queue_depth: int = 0
+
+    def acquired(self, queue_depth: int) -> None:
+        """Marks that a connection was handed out
+
+        Args:
+            queue_depth (int): Amount of callers that were already waiting
+        """
+        self.wait_time = perf_counter() - self.started
+        self.queue_depth = queue_depth
+
+    def finish(self, rows: int = 0) -> None:
+        """Records the statement
+
+        Args:
+            rows (int, optional): Rows returned or changed. Defaults to 0.
+        """
+        self.stats.record(
+            self.query,
+            perf_counter() - self.started,
+            rows,
+            self.wait_time,
+            self.queue_depth,
+        )
+
+
+class QueryStats:
+    """Aggregated timings of every statement run through the database
+
+    Args:
+        slow_threshold (float, optional): Seconds after which a statement is
+            logged to the ``slow_query`` logger, 0 to disable. Defaults to 0.1.
+    """
+
+    def __init__(self, slow_threshold: float = 0.1) -> None:
+        self.slow_threshold: float = slow_threshold
+        self.statements: dict[str, StatementStats] = {}
+
+    def timer(self, query: str) -> QueryTimer:
+        return QueryTimer(self, query)
+
+    def record(
+        self,
+        query: str,
+        elapsed: float,
+        rows: int = 0,
+        wait_time: float = 0.0,
+        queue_depth: int = 0,
+    ) -> None:
+        """Adds a run of a statement to its totals
+
+        Args:
+            query (str): Statement that was run
+            elapsed (float): Seconds taken including waiting for a connection
+            rows (int, optional): Rows returned or changed. Defaults to 0.
+            wait_time (float, optional): Seconds spent waiting for a connection. Defaults to 0.0.
+            queue_depth (int, optional): Callers queued ahead of this one. Defaults to 0.
+        """
+        key = normalize_sql(query)
+        stats = self.statements.get(key)
+        if stats is None:
+            stats = self.statements[key] = StatementStats()
+
+        stats.count += 1
+        stats.total_time += elapsed
+        stats.rows += rows
+        stats.wait_time += wait_time
+        if elapsed > stats.max_time:
+            stats.max_time = elapsed
+        if queue_depth > stats.max_queue_depth:
+            stats.max_queue_depth = queue_depth
+
+        if self.slow_threshold and elapsed >= self.slow_threshold:
+            slow_query_logger.warning(
+                "%.1fms (waited %.1fms, %r queued, %r rows): %s",
+                elapsed * 1000,
+                wait_time * 1000,
+                queue_depth,
+                rows,
+                key,
+            )
+
+    def top(self, limit: int = 10) -> list[tuple[str, StatementStats]]:
+        """Statements that took the most time in total
+
+        Args:
+            limit (int, optional): Amount of statements. Defaults to 10.
+
+        Returns:
+            list[tuple[str, StatementStats]]: Normalized statement and its totals
+        """
+        ranked = sorted(
+            self.statements.items(), key=lambda item: item[1].total_time, reverse=True
+        )
+        return ranked[:limit]
+
+    def reset(self) -> None:
+        self.statements.clear()
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import Counter
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, TypeVar
+
+from discord import DiscordServerError, HTTPException, RateLimited
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """Order jobs are started in, lower values go first"""
+
+    INTERACTIVE = 0
+    FORUM_SYNC = 1
+    LIST_SYNC = 2
+
+
+class OutboundStats(NamedTuple):
+    """Snapshot of :class:`OutboundQueue` counters"""
+
+    queued: dict[Priority, int]
+    running: int
+    completed: int
+    failed: int
+    retries: int
+    max_wait: float
+
+
+class _Job:
+    __slots__ = ("factory", "priority", "route", "idempotent", "future", "queued_at")
+
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[Any]],
+        priority: Priority,
+        route: Hashable,
+        idempotent: bool,
+        future: asyncio.Future[Any],
+    ) -> None:
+        self.factory: Callable[[], Awaitable[Any]] = factory
+        self.priority: Priority = priority
+        self.route: Hashable = route
+        self.idempotent: bool = idempotent
+        self.future: asyncio.Future[Any] = future
+        self.queued_at: float = time.monotonic()
+
+
+_Entry = tuple[int, int, _Job]
+
+
+class _Route:
+    __slots__ = ("slots", "waiting")
+
+    def __init__(self) -> None:
+        # jobs of the route handed to the workers, queued or running
+        self.slots: int = 0
+        # jobs held back until one of those finishes
+        self.waiting: list[_Entry] = []
+
+
+class OutboundQueue:
+    """Runs Discord API calls on a fixed amount of workers, interactive work is
+    started before background syncs and calls on the same route don't overlap
+
+    Jobs are only handed to the workers once their route has a free slot, so a
+    busy route holds back its own jobs without occupying workers other routes
+    could use.
+
+    discord.py already waits out short rate limits, calls failing with a rate
+    limit are retried here with the ``Retry-After`` given. Server errors are
+    only retried for idempotent calls, the request may have gone through and
+    sending a message again would post it twice.
+
+    Args:
+        workers (int, optional): Calls running at once. Defaults to 4.
+        route_limit (int, optional): Calls running at once per route. Defaults to 1.
+        max_attempts (int, optional): Attempts before a call fails. Defaults to 3.
+        backoff (float, optional): Seconds before the first retry without a
+            ``Retry-After``, doubled for every retry. Defaults to 1.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 4,
+        route_limit: int = 1,
+        max_attempts: int = 3,
+        backoff: float = 1.0,
+    ) -> None:
+        self.worker_count: int = workers
+        self.route_limit: int = route_limit
+        self.max_attempts: int = max_attempts
+        self.backoff: float = backoff
+
+        self._queue: asyncio.PriorityQueue[_Entry] | None = None
+        self._sequence = itertools.count()
+        self._workers: list[asyncio.Task[None]] = []
+        self._routes: dict[Hashable, _Route] = {}
+
+        self._queued: Counter[Priority] = Counter()
+        self.running: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        self.retries: int = 0
+        self.max_wait: float = 0.0
+
+    def start(self) -> None:
+        """Starts the workers, must be called from within the event loop"""
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"outbound-worker-{index}")
+            for index in range(self.worker_count)
+        ]
+
+    async def close(self) -> None:
+        """Stops the workers, jobs still queued are cancelled"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        queue = self._queue
+        while queue is not None and not queue.empty():
+            *_, job = queue.get_nowait()
+            job.future.cancel()
+        for route in self._routes.values():
+            for *_, job in route.waiting:
+                job.future.cancel()
+        self._routes.clear()
+        self._queued.clear()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._queued.values())
+
+    def stats(self) -> OutboundStats:
+        return OutboundStats(
+            queued={priority: self._queued[priority] for priority in Priority},
+            running=self.running,
+            completed=self.completed,
+            failed=self.failed,
+            retries=self.retries,
+            max_wait=self.max_wait,
+        )
+
+    def submit(
+        self,
+        factory: Callable[[], Awaitable[T]],
+        *,
+        priority: Priority,
+        route: Hashable,
+        idempotent: bool = False,
+    ) -> asyncio.Future[T]:
+        """Queues a call
+
+        Args:
+            factory (Callable[[], Awaitable[T]]): Makes the call, called again for retries
+            priority (Priority): Priority of the call
+            route (Hashable): What the call acts on, usually a channel ID
+            idempotent (bool, optional): Repeating the call is harmless, e.g. an edit,
+                allows retrying it after a server error. Defaults to False.
+
+        Raises:
+            RuntimeError: Queue wasn't started
+
+        Returns:
+            asyncio.Future[T]: Result of the call
+        """
+        if self._queue is None or not self._workers:
+            raise RuntimeError("Outbound queue isn't running")
+
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        job = _Job(factory, priority, route, idempotent, future)
+        entry = (priority, next(self._sequence), job)
+        self._queued[priority] += 1
+
+        state = self._routes.get(route)
+        if state is None:
+            state = self._routes[route] = _Route()
+        if state.slots < self.route_limit:
+            state.slots += 1
+            self._queue.put_nowait(entry)
+        else:
+            heapq.heappush(state.waiting, entry)
+        return future
+
+    async def run(
+        self,
+        factory: Callable[[], Awaitable[T]],
+        *,
+        priority: Priority,
+        route: Hashable,
+        idempotent: bool = False,
+    ) -> T:
+        """Queues a call and waits for its result, see :meth:`submit`"""
+        return await self.submit(
+            factory, priority=priority, route=route, idempotent=idempotent
+        )
+
+    def _release(self, key: Hashable) -> None:
+        # the finished job's slot goes to the route's next job, if any
+        route = self._routes.get(key)
+        if route is None:
+            return
+        if route.waiting:
+            assert self._queue is not None
+            self._queue.put_nowait(heapq.heappop(route.waiting))
+            return
+        route.slots -= 1
+        if not route.slots:
+            del self._routes[key]
+
+    def _retry_delay(self, job: _Job, exc: Exception, attempt: int) -> float | None:
+        if isinstance(exc, RateLimited):
+            return exc.retry_after
+        if isinstance(exc, DiscordServerError):
+            return self.backoff * 2**attempt if job.idempotent else None
+        if isinstance(exc, HTTPException) and exc.status == 429:
+            retry_after = exc.response.headers.get("Retry-After")
+            try:
+                return float(retry_after)
+            except (TypeError, ValueError):
+                return self.backoff * 2**attempt
+        return None
+
+    async def _call(self, job: _Job) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return await job.factory()
+            except Exception as exc:
+                attempt += 1
+                delay = self._retry_delay(job, exc, attempt - 1)
+                if delay is None or attempt >= self.max_attempts:
+                    raise
+                self.retries += 1
+                logger.warning(
+                    "Retrying %s call on route %r in %.2fs (attempt %r): %s",
+                    job.priority.name,
+                    job.route,
+                    delay,
+                    attempt,
+                    exc,
+                )
+                await asyncio.sleep(delay)
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            *_, job = await self._queue.get()
+            self._queued[job.priority] -= 1
+            try:
+                if not job.future.cancelled():
+                    await self._run_job(job)
+            finally:
+                self._release(job.route)
+
+    async def _run_job(self, job: _Job) -> None:
+        self.max_wait = max(self.max_wait, time.monotonic() - job.queued_at)
+        self.running += 1
+        try:
+            result = await self._call(job)
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as exc:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(exc)
+        else:
+            self.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self.running -= 1
@@ -1,3 +1,8 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Protocol, Sequence, TYPE_CHECKING
+
 from discord import (
     ui,
     Interaction,
@@ -11,21 +16,100 @@ from discord import (
 from .mixins import InteractionCheckedView
 
 
+if TYPE_CHECKING:
+    from .facility import Facility
+    from .flags import ItemServiceFlags, VehicleServiceFlags
+
+
+class PageSource(Protocol):
+    """Provides pages to a :class:`Paginator` on demand"""
+
+    def __len__(self) -> int: ...
+
+    async def get_page(self, page_number: int) -> list[Embed]:
+        """Builds a page
+
+        Args:
+            page_number (int): Index of the page
+
+        Raises:
+            IndexError: Page doesn't exist
+
+        Returns:
+            list[Embed]: Embeds of the page
+        """
+        ...
+
+
+class ListPageSource:
+    """Pages that are already built
+
+    Args:
+        pages (list[list[Embed]]): Embeds of each page
+    """
+
+    def __init__(self, pages: list[list[Embed]]) -> None:
+        self.pages: list[list[Embed]] = pages
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    async def get_page(self, page_number: int) -> list[Embed]:
+        return self.pages[page_number]
+
+
+class FacilityPageSource:
+    """One page per facility, rendered when the page is shown
+
+    Args:
+        facilities (Sequence[Facility]): Facilities to page through
+        item_service_highlight (ItemServiceFlags, optional): Item services to highlight
+        vehicle_service_highlight (VehicleServiceFlags, optional): Vehicle services to highlight
+        vehicle_highlight (str, optional): Vehicle to highlight
+    """
+
+    def __init__(
+        self,
+        facilities: Sequence[Facility],
+        item_service_highlight: ItemServiceFlags | None = None,
+        vehicle_service_highlight: VehicleServiceFlags | None = None,
+        vehicle_highlight: str = "",
+    ) -> None:
+        self.facilities: Sequence[Facility] = facilities
+        self.highlights: dict[str, Any] = {"vehicle_highlight": vehicle_highlight}
+        if item_service_highlight is not None:
+            self.highlights["item_service_highlight"] = item_service_highlight
+        if vehicle_service_highlight is not None:
+            self.highlights["vehicle_service_highlight"] = vehicle_service_highlight
+
+    def __len__(self) -> int:
+        return len(self.facilities)
+
+    async def get_page(self, page_number: int) -> list[Embed]:
+        if page_number < 0:
+            raise IndexError(page_number)
+        return self.facilities[page_number].embeds(**self.highlights)
+
+
 class Paginator(InteractionCheckedView):
     def __init__(
         self,
         *,
         timeout: float = 120,
         original_author: User | Member,
+        cache_size: int = 5,
     ) -> None:
         super().__init__(timeout=timeout, original_author=original_author)
 
         self.ephemeral = None
-        self.pages = None
+        self.source: PageSource | None = None
         self.total_page_count = None
         self.author = None
         self.current_page = None
         self.original_message = None
+        # recently shown pages, kept so paging back and forth doesn't rebuild them
+        self.cache_size: int = cache_size
+        self._page_cache: OrderedDict[int, list[Embed]] = OrderedDict()
 
     async def on_timeout(self) -> None:
         """Remove view on timeout"""
@@ -38,7 +122,7 @@ class Paginator(InteractionCheckedView):
     async def start(
         self,
         interaction: Interaction,
-        pages: list[list[Embed]],
+        pages: list[list[Embed]] | PageSource,
         ephemeral: bool = False,
         one_time_message: Embed | None = None,
     ) -> None:
@@ -46,17 +130,21 @@ class Paginator(InteractionCheckedView):
 
         Args:
             interaction (Interaction): Interaction to use
-            pages (list[list[Embed]]): List of embeds
+            pages (list[list[Embed]] | PageSource): List of embeds or a source
+                building pages when they are shown
         """
+        if isinstance(pages, list):
+            pages = ListPageSource(pages)
+
         self.ephemeral = ephemeral
-        self.pages = pages
+        self.source = pages
         self.total_page_count = len(pages)
         self.author = interaction.user
         self.current_page = 0
 
         self._update_labels(self.current_page)
 
-        page = pages[self.current_page][:]
+        page = (await self.get_page(self.current_page))[:]
         if one_time_message:
             page.append(one_time_message)
 
@@ -77,8 +165,34 @@ class Paginator(InteractionCheckedView):
         )
         self.go_to_previous_page.disabled = page_number == 0
 
+    async def get_page(self, page_number: int) -> list[Embed]:
+        """Gets a page from the cache or builds it with :attr:`source`
+
+        Args:
+            page_number (int): Index of the page
+
+        Raises:
+            IndexError: Page doesn't exist
+
+        Returns:
+            list[Embed]: Embeds of the page
+        """
+        cache = self._page_cache
+        page = cache.get(page_number)
+        if page is not None:
+            cache.move_to_end(page_number)
+            return page
+
+        if self.source is None:
+            raise IndexError(page_number)
+        page = await self.source.get_page(page_number)
+        cache[page_number] = page
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return page
+
     async def show_page(self, interaction: Interaction, page_number: int) -> None:
-        page = self.pages[page_number]
+        page = await self.get_page(page_number)
         self.current_page = page_number
         self._update_labels(page_number)
         if interaction.response.is_done():
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from discord import Embed
+
+from .cache import TTLCache
+from .embeds import ephemeral_info
+
+
+if TYPE_CHECKING:
+    from discord import Interaction
+
+    from bot import FacilityBot
+
+
+_MISSING = object()
+
+
+class Preferences:
+    """Cached access to ``user_options``, guild settings are kept in
+    :attr:`Database.locations`
+
+    Every write to the table should go through here so the cache never
+    serves a stale value.
+
+    Args:
+        bot (FacilityBot): Bot instance
+        ttl (float, optional): Seconds a preference is cached for. Defaults to 600.
+        max_size (int, optional): Maximum cached users. Defaults to 4096.
+    """
+
+    def __init__(
+        self, bot: FacilityBot, *, ttl: float = 600.0, max_size: int = 4096
+    ) -> None:
+        self.bot: FacilityBot = bot
+        self._ephemeral: TTLCache[int, bool] = TTLCache(max_size, ttl)
+        self._ephemeral_info: Embed | None = None
+
+    async def ephemeral(self, user_id: int) -> bool | None:
+        """Gets a user's ephemeral preference, the first lookup for a user stores
+        the default
+
+        Args:
+            user_id (int): User ID
+
+        Returns:
+            bool | None: Preference, None if the user had no preference stored yet
+        """
+        preference = self._ephemeral.get(user_id, _MISSING)
+        if preference is not _MISSING:
+            return preference
+
+        preference = await self.bot.db.ephemeral_preference(user_id)
+        # a missing row is created with False
+        self._ephemeral.set(user_id, preference or False)
+        return preference
+
+    async def set_ephemeral(self, user_id: int, ephemeral: bool) -> None:
+        query = """INSERT OR REPLACE INTO user_options VALUES (?,?)"""
+        await self.bot.db.execute(query, user_id, ephemeral)
+        self._ephemeral.set(user_id, ephemeral)
+
+    async def toggle_ephemeral(self, user_id: int) -> bool:
+        """Flips a user's ephemeral preference
+
+        Args:
+            user_id (int): User ID
+
+        Returns:
+            bool: New preference
+        """
+        new_choice = not await self.ephemeral(user_id)
+        await self.set_ephemeral(user_id, new_choice)
+        return new_choice
+
+    async def resolve_ephemeral(
+        self, interaction: Interaction, ephemeral: bool
+    ) -> tuple[bool, Embed | None]:
+        """Works out if a response should be ephemeral, an explicit ``ephemeral``
+        option always wins over the stored preference
+
+        Args:
+            interaction (Interaction): Interaction being responded to
+            ephemeral (bool): Value of the command's ephemeral option
+
+        Returns:
+            tuple[bool, Embed | None]: Whether to respond ephemerally and an embed
+            explaining the preference to attach the first time a user is seen
+        """
+        if interaction.namespace.ephemeral is not None:
+            return ephemeral, None
+
+        preference = await self.ephemeral(interaction.user.id)
+        if preference is not None:
+            return preference, None
+
+        info = self._ephemeral_info
+        if info is None:
+            info = await ephemeral_info(self.bot)
+            # only keep it once the command mention could be resolved
+            if "</toggle_ephemeral:" in (info.description or ""):
+                self._ephemeral_info = info
+        return False, info.copy()
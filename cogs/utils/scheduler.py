@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+
+
+class _PendingRefresh:
+    __slots__ = ("first_marked", "last_marked", "dirty", "wake", "task")
+
+    def __init__(self, now: float) -> None:
+        self.first_marked: float = now
+        self.last_marked: float = now
+        self.dirty: bool = True
+        self.wake: asyncio.Event = asyncio.Event()
+        self.task: asyncio.Task[None] | None = None
+
+
+class RefreshScheduler(Generic[K]):
+    """Coalesces refresh requests per key, a refresh runs once nothing was marked
+    for ``quiet_period`` seconds or ``max_delay`` seconds after the first mark
+
+    Only one refresh runs per key at a time, marks made while it runs cause
+    another refresh afterwards.
+
+    Args:
+        refresh (Callable[[K], Awaitable[None]]): Does the refresh for a key
+        quiet_period (float, optional): Seconds without marks before refreshing. Defaults to 5.
+        max_delay (float, optional): Most seconds a mark waits for. Defaults to 30.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[K], Awaitable[None]],
+        *,
+        quiet_period: float = 5.0,
+        max_delay: float = 30.0,
+    ) -> None:
+        self.refresh: Callable[[K], Awaitable[None]] = refresh
+        self.quiet_period: float = quiet_period
+        self.max_delay: float = max_delay
+        self._pending: dict[K, _PendingRefresh] = {}
+
+    def mark(self, key: K) -> None:
+        """Requests a refresh for a key
+
+        Args:
+            key (K): Key to refresh
+        """
+        now = time.monotonic()
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingRefresh(now)
+            pending.task = asyncio.create_task(
+                self._run(key, pending), name=f"refresh-{key}"
+            )
+            return
+
+        if not pending.dirty:
+            # first mark since the running refresh started
+            pending.first_marked = now
+            pending.dirty = True
+        pending.last_marked = now
+
+    async def _wait(self, pending: _PendingRefresh) -> None:
+        while not pending.wake.is_set():
+            deadline = min(
+                pending.last_marked + self.quiet_period,
+                pending.first_marked + self.max_delay,
+            )
+            delay = deadline - time.monotonic()
+            if delay <= 0:
+                return
+            try:
+                await asyncio.wait_for(pending.wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, key: K, pending: _PendingRefresh) -> None:
+        try:
+            while pending.dirty:
+                await self._wait(pending)
+                pending.dirty = False
+                try:
+                    await self.refresh(key)
+                except Exception:
+                    logger.exception("Failed refreshing %r", key)
+        finally:
+            del self._pending[key]
+
+    async def flush(self) -> None:
+        """Runs every pending refresh now and waits for them to finish"""
+        tasks = []
+        for pending in self._pending.values():
+            pending.wake.set()
+            if pending.task is not None:
+                tasks.append(pending.task)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,19 +1,26 @@
 from __future__ import annotations
 
 from enum import Enum, auto
-from typing import List, Dict, Iterable, TYPE_CHECKING
+from typing import List, Iterable, AsyncIterator, NamedTuple, TYPE_CHECKING
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from operator import attrgetter
+import asyncio
+import re
 import sqlite3
 import logging
 import aiosqlite
 from aiosqlite import Row
 
 from .facility import Facility
+from .cache import FacilityCache
+from .metrics import QueryStats, QueryTimer
 from .flags import ItemServiceFlags, VehicleServiceFlags
 
 
 if TYPE_CHECKING:
-    from discord import Guild, TextChannel
+    from discord import Guild, TextChannel, Thread
 
     from bot import FacilityBot
 
@@ -45,10 +52,594 @@ def convert_int(i: bytes):
     return bool(int(i))
 
 
+# Maximum amount of IDs bound in a single IN (...) lookup, must be a power of two
+MAX_ID_CHUNK = 256
+
+# Ordered schema migrations, the index + 1 of each script is the user_version it
+# migrates to. Only ever append to this, released migrations must not change.
+MIGRATIONS: tuple[str, ...] = (
+    # 1: initial schema, IF NOT EXISTS as installs before versioning already have it
+    """
+    CREATE TABLE IF NOT EXISTS "facilities" (
+        "id_"	INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE,
+        "name"	TEXT,
+        "description"	TEXT,
+        "region"	TEXT,
+        "coordinates"	TEXT,
+        "marker"	INTEGER,
+        "maintainer"	TEXT,
+        "author"	INTEGER,
+        "item_services"	ITEM_SERVICES,
+        "vehicle_services"	VEHICLE_SERVICES,
+        "creation_time"	INTEGER,
+        "guild_id"	INTEGER,
+        "image_url"	TEXT,
+        "thread_id"	INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS "blacklist" (
+        "object_id"	INTEGER UNIQUE,
+        "reason"	TEXT,
+        PRIMARY KEY("object_id")
+    );
+    CREATE TABLE IF NOT EXISTS "list" (
+        "guild_id"	INTEGER UNIQUE,
+        "channel_id"	INTEGER,
+        "messages"	messages,
+        PRIMARY KEY("guild_id")
+    );
+    CREATE TABLE IF NOT EXISTS "command_stats" (
+        "name"	TEXT NOT NULL,
+        "run_count"	INTEGER NOT NULL,
+        "guild_id"	INTEGER NOT NULL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS "command_index" ON "command_stats" (
+        "name",
+        "guild_id"
+    );
+    CREATE TABLE IF NOT EXISTS "response" (
+        "guild_id"	INTEGER UNIQUE,
+        "channel_ids"	CHANNEL_IDS,
+        PRIMARY KEY("guild_id")
+    );
+    CREATE TABLE IF NOT EXISTS "user_options" (
+        "user_id"	INTEGER,
+        "ephemeral"	BOOL,
+        PRIMARY KEY("user_id")
+    );
+    CREATE TABLE IF NOT EXISTS "guild_options" (
+        "guild_id"	INTEGER,
+        "forum_id"	INTEGER,
+        PRIMARY KEY("guild_id")
+    );
+    """,
+    # 2: indexes for the per guild lookups done by /list, /locate, /remove and autocomplete
+    """
+    CREATE INDEX IF NOT EXISTS "facilities_guild_region_index" ON "facilities" (
+        "guild_id",
+        "region"
+    );
+    CREATE INDEX IF NOT EXISTS "facilities_guild_author_index" ON "facilities" (
+        "guild_id",
+        "author"
+    );
+    CREATE INDEX IF NOT EXISTS "facilities_guild_name_index" ON "facilities" (
+        "guild_id",
+        "name" COLLATE NOCASE
+    );
+    """,
+    # 3: full text index for autocomplete and /search, kept in sync by triggers
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS "facilities_fts" USING fts5(
+        "name",
+        "description",
+        "maintainer",
+        "marker",
+        content="facilities",
+        content_rowid="id_",
+        tokenize="unicode61 remove_diacritics 2",
+        prefix="2 3"
+    );
+    CREATE TRIGGER IF NOT EXISTS "facilities_fts_insert" AFTER INSERT ON "facilities" BEGIN
+        INSERT INTO facilities_fts (rowid, name, description, maintainer, marker)
+        VALUES (new.id_, new.name, new.description, new.maintainer, new.marker);
+    END;
+    CREATE TRIGGER IF NOT EXISTS "facilities_fts_delete" AFTER DELETE ON "facilities" BEGIN
+        INSERT INTO facilities_fts (facilities_fts, rowid, name, description, maintainer, marker)
+        VALUES ('delete', old.id_, old.name, old.description, old.maintainer, old.marker);
+    END;
+    CREATE TRIGGER IF NOT EXISTS "facilities_fts_update" AFTER UPDATE OF name, description, maintainer, marker ON "facilities" BEGIN
+        INSERT INTO facilities_fts (facilities_fts, rowid, name, description, maintainer, marker)
+        VALUES ('delete', old.id_, old.name, old.description, old.maintainer, old.marker);
+        INSERT INTO facilities_fts (rowid, name, description, maintainer, marker)
+        VALUES (new.id_, new.name, new.description, new.maintainer, new.marker);
+    END;
+    INSERT INTO facilities_fts (facilities_fts) VALUES ('rebuild');
+    """,
+    # 4: content hashes of the posted list embeds, lets list updates skip unchanged messages
+    """
+    ALTER TABLE "list" ADD COLUMN "hashes" messages;
+    """,
+    # 5: forum backfills started by /create_fourm, resumed if the bot restarts midway
+    """
+    CREATE TABLE IF NOT EXISTS "forum_backfill" (
+        "guild_id"	INTEGER,
+        "forum_id"	INTEGER NOT NULL,
+        PRIMARY KEY("guild_id")
+    );
+    """,
+    # 6: hashes of 2^63 and up were stored as REAL by single message lists, drop them
+    """
+    UPDATE "list" SET "hashes" = NULL WHERE typeof("hashes") == 'real';
+    """,
+)
+
+
+def fts_query(text: str, column: str | None = None) -> str | None:
+    """Turns user input into an FTS5 query matching the start of every word
+
+    Args:
+        text (str): User input
+        column (str, optional): Only match this column
+
+    Returns:
+        str | None: MATCH expression, None if there's nothing to search for
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+
+    expression = " ".join(f'"{word}"*' for word in words)
+    if column:
+        return f"{column} : ({expression})"
+    return expression
+
+
+class PragmaProfile(NamedTuple):
+    """PRAGMA settings applied to every connection when it is opened
+
+    Defaults to WAL so reads never wait on the writer, with ``synchronous=NORMAL``
+    which is durable in WAL mode except for the last commits on power loss.
+
+    Args:
+        journal_mode (str): Journal mode. Defaults to "WAL".
+        synchronous (str): Sync level. Defaults to "NORMAL".
+        cache_size (int): Page cache size, negative values are in KiB. Defaults to -16000.
+        mmap_size (int): Bytes of the file to memory map. Defaults to 64MiB.
+        temp_store (str): Where temporary tables are stored. Defaults to "MEMORY".
+        busy_timeout (int): Milliseconds to wait on a locked database. Defaults to 5000.
+        checkpoint_interval (float): Seconds between WAL checkpoints, 0 to disable. Defaults to 300.
+    """
+
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size: int = -16000
+    mmap_size: int = 64 * 1024 * 1024
+    temp_store: str = "MEMORY"
+    busy_timeout: int = 5000
+    checkpoint_interval: float = 300
+
+    def statements(self) -> list[str]:
+        return [
+            f"PRAGMA journal_mode = {self.journal_mode}",
+            f"PRAGMA synchronous = {self.synchronous}",
+            f"PRAGMA cache_size = {int(self.cache_size)}",
+            f"PRAGMA mmap_size = {int(self.mmap_size)}",
+            f"PRAGMA temp_store = {self.temp_store}",
+            f"PRAGMA busy_timeout = {int(self.busy_timeout)}",
+        ]
+
+    @property
+    def wal(self) -> bool:
+        return self.journal_mode.upper() == "WAL"
+
+
+class WriteMethod(Enum):
+    EXECUTE = auto()
+    EXECUTEMANY = auto()
+    SCRIPT = auto()
+
+
+class WriteJob(NamedTuple):
+    query: str
+    params: tuple | list[tuple]
+    method: WriteMethod
+    future: asyncio.Future[int | None]
+    queued_at: float
+    queue_depth: int
+
+
+class DatabaseWriter:
+    """Single worker that owns the only connection used for writing
+
+    Jobs are queued and run one after another on a dedicated thread. Writes that
+    are queued within ``batch_window`` seconds of each other are merged into one
+    transaction so they share a single commit, each job runs in its own savepoint
+    so a failing statement only fails its own caller. Scripts are never batched
+    as they manage their own transactions.
+
+    Args:
+        db_file (Path): sqlite file to use
+        pragmas (PragmaProfile): PRAGMA settings to apply to the connection
+        batch_window (float, optional): Seconds to wait for more writes before committing. Defaults to 0.005.
+        max_batch (int, optional): Maximum amount of writes per transaction. Defaults to 64.
+        stats (QueryStats, optional): Where to record how long each write took
+    """
+
+    def __init__(
+        self,
+        db_file,
+        pragmas: PragmaProfile,
+        *,
+        batch_window: float = 0.005,
+        max_batch: int = 64,
+        stats: QueryStats | None = None,
+    ) -> None:
+        self.db_file = db_file
+        self.pragmas: PragmaProfile = pragmas
+        self.stats: QueryStats | None = stats
+        self.batch_window: float = batch_window
+        self.max_batch: int = max_batch
+        self._queue: asyncio.Queue[WriteJob | None] = asyncio.Queue()
+        self._executor: ThreadPoolExecutor | None = None
+        self._conn: sqlite3.Connection | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sqlite-writer"
+        )
+        await self._run_in_thread(self._connect)
+        self._task = asyncio.create_task(self._run(), name="sqlite-writer")
+
+    async def stop(self) -> None:
+        """Finishes every queued write then closes the connection"""
+        if self._task is None:
+            return
+
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+        await self._run_in_thread(self._close)
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def submit(
+        self,
+        query: str,
+        params: tuple | list[tuple] = (),
+        method: WriteMethod = WriteMethod.EXECUTE,
+    ) -> int | None:
+        """Queues a write and waits for it to be committed
+
+        Args:
+            query (str): Statement or script to run
+            params (tuple | list[tuple], optional): Parameters, a list of tuples for executemany
+            method (WriteMethod, optional): How to run the statement. Defaults to WriteMethod.EXECUTE.
+
+        Raises:
+            RuntimeError: Writer has not been started
+            sqlite3.Error: Statement failed, only this job is rolled back
+
+        Returns:
+            int | None: lastrowid of the statement
+        """
+        if self._task is None:
+            raise RuntimeError("Database writer is not running")
+
+        future: asyncio.Future[int | None] = asyncio.get_running_loop().create_future()
+        job = WriteJob(query, params, method, future, perf_counter(), self.queue_depth)
+        self._queue.put_nowait(job)
+        return await future
+
+    async def _run_in_thread(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> None:
+        conn = sqlite3.connect(self.db_file, isolation_level=None)
+        for statement in self.pragmas.statements():
+            conn.execute(statement)
+        self._conn = conn
+
+    async def migrate(self, migrations: tuple[str, ...]) -> int:
+        """Runs every migration newer than the database's ``user_version``
+
+        Args:
+            migrations (tuple[str, ...]): Ordered migration scripts
+
+        Returns:
+            int: Schema version after migrating
+        """
+        return await self._run_in_thread(self._migrate, migrations)
+
+    def _migrate(self, migrations: tuple[str, ...]) -> int:
+        conn = self._conn
+        if conn is None:
+            raise RuntimeError("Database writer is not connected")
+
+        (version,) = conn.execute("PRAGMA user_version").fetchone()
+        for new_version, script in enumerate(migrations[version:], start=version + 1):
+            try:
+                conn.executescript(
+                    f"BEGIN IMMEDIATE;\n{script}\nPRAGMA user_version = {new_version};\nCOMMIT;"
+                )
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            logger.info("Migrated database to schema version %r", new_version)
+            version = new_version
+        return version
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _run(self) -> None:
+        queue = self._queue
+        held: list[WriteJob | None] = []
+        while True:
+            job = held.pop() if held else await queue.get()
+            if job is None:
+                return
+
+            if job.method is WriteMethod.SCRIPT:
+                batch = [job]
+            else:
+                if self.batch_window and queue.empty():
+                    await asyncio.sleep(self.batch_window)
+
+                batch = [job]
+                while len(batch) < self.max_batch and not queue.empty():
+                    next_job = queue.get_nowait()
+                    if next_job is None or next_job.method is WriteMethod.SCRIPT:
+                        held.append(next_job)
+                        break
+                    batch.append(next_job)
+
+            started = perf_counter()
+            try:
+                results = await self._run_in_thread(self._write_batch, batch)
+            except Exception as exc:
+                logger.exception("Failed writing batch of %r job(s)", len(batch))
+                results = [(exc, 0.0, 0)] * len(batch)
+
+            for batch_job, (result, elapsed, rows) in zip(batch, results):
+                if self.stats is not None:
+                    wait_time = started - batch_job.queued_at
+                    self.stats.record(
+                        batch_job.query,
+                        wait_time + elapsed,
+                        rows,
+                        wait_time,
+                        batch_job.queue_depth,
+                    )
+                if batch_job.future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    batch_job.future.set_exception(result)
+                else:
+                    batch_job.future.set_result(result)
+
+    def _write_batch(
+        self, batch: list[WriteJob]
+    ) -> list[tuple[int | None | Exception, float, int]]:
+        """Runs a batch of jobs in one transaction
+
+        Returns:
+            list[tuple[int | None | Exception, float, int]]: Result, seconds taken
+            and rows changed for each job
+        """
+        conn = self._conn
+        if conn is None:
+            raise RuntimeError("Database writer is not connected")
+
+        if batch[0].method is WriteMethod.SCRIPT:
+            started = perf_counter()
+            try:
+                conn.executescript(batch[0].query)
+            except sqlite3.Error as exc:
+                return [(exc, perf_counter() - started, 0)]
+            return [(None, perf_counter() - started, 0)]
+
+        results: list[tuple[int | None | Exception, float, int]] = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for job in batch:
+                started = perf_counter()
+                conn.execute("SAVEPOINT job")
+                try:
+                    if job.method is WriteMethod.EXECUTEMANY:
+                        cur = conn.executemany(job.query, job.params)
+                    else:
+                        cur = conn.execute(job.query, job.params)
+                except sqlite3.Error as exc:
+                    conn.execute("ROLLBACK TO job")
+                    results.append((exc, perf_counter() - started, 0))
+                else:
+                    results.append(
+                        (cur.lastrowid, perf_counter() - started, max(cur.rowcount, 0))
+                    )
+                finally:
+                    conn.execute("RELEASE job")
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        logger.debug("Committed %r write(s) in one transaction", len(batch))
+        return results
+
+
+class GuildLocation(NamedTuple):
+    """Where a guild's forum and facility list live"""
+
+    forum_id: int | None = None
+    list_channel_id: int | None = None
+    list_messages: tuple[int, ...] = ()
+    # content hash of the embed last posted in each list message
+    list_hashes: tuple[int, ...] = ()
+
+
+class FacilityQuery(NamedTuple):
+    """Filters used to select facilities
+
+    Every combination of filters maps to one fixed parameterized statement so
+    repeated searches reuse sqlite's prepared statement cache.
+
+    Args:
+        guild_id (int, optional): Guild the facilities belong to
+        region (str, optional): Exact region
+        author (int, optional): Author ID
+        item_services (int, optional): Bitmask, matches facilities with any of these item services
+        vehicle_services (int, optional): Bitmask, matches facilities with any of these vehicle services
+        name_prefix (str, optional): Case insensitive prefix of the name
+        limit (int, optional): Maximum amount of facilities
+        offset (int, optional): Amount of facilities to skip
+        order_by_region (bool, optional): Order by region then ID instead of only ID
+    """
+
+    guild_id: int | None = None
+    region: str | None = None
+    author: int | None = None
+    item_services: int = 0
+    vehicle_services: int = 0
+    name_prefix: str = ""
+    limit: int | None = None
+    offset: int = 0
+    order_by_region: bool = False
+
+    def where(self) -> tuple[str, tuple]:
+        """Builds the WHERE clause for the set filters
+
+        Returns:
+            tuple[str, tuple]: Clause (empty if no filters are set) and its parameters
+        """
+        clauses: list[str] = []
+        params: list[str | int] = []
+
+        if self.guild_id is not None:
+            clauses.append("guild_id == ?")
+            params.append(self.guild_id)
+        if self.region:
+            clauses.append("region == ?")
+            params.append(self.region)
+        if self.author:
+            clauses.append("author == ?")
+            params.append(self.author)
+        if self.item_services:
+            clauses.append("(item_services & ?) != 0")
+            params.append(self.item_services)
+        if self.vehicle_services:
+            clauses.append("(vehicle_services & ?) != 0")
+            params.append(self.vehicle_services)
+        if self.name_prefix:
+            # a range instead of LIKE so the (guild_id, name COLLATE NOCASE) index is used
+            clauses.append("name COLLATE NOCASE >= ? AND name COLLATE NOCASE < ?")
+            params.extend((self.name_prefix, self.name_prefix + "\U0010ffff"))
+
+        if not clauses:
+            return "", ()
+        return " WHERE " + " AND ".join(clauses), tuple(params)
+
+    def matches(self, facility: Facility) -> bool:
+        """Checks a facility against the filters in memory, ignores limit and offset
+
+        Args:
+            facility (Facility): Facility to check
+
+        Returns:
+            bool: Whether the facility would be selected by :meth:`to_sql`
+        """
+        if self.guild_id is not None and facility.guild_id != self.guild_id:
+            return False
+        if self.region and facility.region != self.region:
+            return False
+        if self.author and facility.author != self.author:
+            return False
+        if self.item_services and not facility.item_services.value & self.item_services:
+            return False
+        if (
+            self.vehicle_services
+            and not facility.vehicle_services.value & self.vehicle_services
+        ):
+            return False
+        if self.name_prefix and not facility.name.lower().startswith(
+            self.name_prefix.lower()
+        ):
+            return False
+        return True
+
+    def to_sql(self) -> tuple[str, tuple]:
+        """Builds the full SELECT statement
+
+        Returns:
+            tuple[str, tuple]: Statement and its parameters
+        """
+        where, params = self.where()
+        order = "region, id_" if self.order_by_region else "id_"
+        sql = f"SELECT * FROM facilities{where} ORDER BY {order} LIMIT ? OFFSET ?"
+        limit = -1 if self.limit is None else self.limit
+        return sql, params + (limit, self.offset)
+
+
 class Database:
-    def __init__(self, bot: FacilityBot, db_file) -> None:
+    """Async wrapper around the bot's sqlite database
+
+    Reads use connections that are kept open in a fixed size pool for the
+    lifetime of the bot, writes are queued on a single :class:`DatabaseWriter`.
+    :meth:`open` must be awaited before any queries are made.
+
+    Facilities of recently used guilds are kept in :attr:`cache`, which is kept
+    up to date by the ``facility_create``, ``facility_modify`` and
+    ``bulk_facility_delete`` events.
+
+    Args:
+        bot (FacilityBot): Bot instance
+        db_file (Path): sqlite file to use
+        pool_size (int, optional): Amount of connections to keep open. Defaults to 4.
+        pragmas (PragmaProfile, optional): PRAGMA settings for every connection.
+        slow_query_threshold (float, optional): Seconds after which a statement is
+            logged as slow, 0 to disable. Defaults to 0.1.
+    """
+
+    def __init__(
+        self,
+        bot: FacilityBot,
+        db_file,
+        *,
+        pool_size: int = 4,
+        pragmas: PragmaProfile = PragmaProfile(),
+        slow_query_threshold: float = 0.1,
+    ) -> None:
         self.bot: FacilityBot = bot
         self.db_file = db_file
+        self.pool_size: int = pool_size
+        self.pragmas: PragmaProfile = pragmas
+        self._pool: asyncio.Queue[aiosqlite.Connection] | None = None
+        self._pool_waiters: int = 0
+        self._connections: list[aiosqlite.Connection] = []
+        self._checkpoint_task: asyncio.Task[None] | None = None
+        self.stats: QueryStats = QueryStats(slow_query_threshold)
+        self.writer: DatabaseWriter = DatabaseWriter(db_file, pragmas, stats=self.stats)
+        self.cache: FacilityCache = FacilityCache()
+        self._cache_loads: dict[int, asyncio.Task[list[Facility]]] = {}
+        # every guild with a forum or list, loaded on open and kept in sync by
+        # set_forum, set_list and remove_list
+        self.locations: dict[int, GuildLocation] = {}
+        # channels the "how much does" responder is enabled in, per guild
+        self.response_channels: dict[int, tuple[int, ...]] = {}
         aiosqlite.register_adapter(AdaptableList, AdaptableList.adapt)
         aiosqlite.register_converter("messages", AdaptableList.convert)
         aiosqlite.register_adapter(AdaptableList, AdaptableList.adapt)
@@ -62,15 +653,159 @@ class Database:
         aiosqlite.register_adapter(bool, adapt_bool)
         aiosqlite.register_converter("BOOL", convert_int)
 
-    @asynccontextmanager
-    async def _connect(self):
-        conn = await aiosqlite.connect(
-            self.db_file, detect_types=sqlite3.PARSE_DECLTYPES
+    async def open(self) -> None:
+        """Opens the connection pool, does nothing if already open"""
+        if self._pool is not None:
+            return
+
+        # writer first so journal_mode is switched and the schema is up to date
+        # before any reader connects
+        await self.writer.start()
+        await self.migrate()
+
+        pool: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue(
+            maxsize=self.pool_size
+        )
+        for _ in range(self.pool_size):
+            conn = await aiosqlite.connect(
+                self.db_file, detect_types=sqlite3.PARSE_DECLTYPES
+            )
+            for statement in self.pragmas.statements():
+                await conn.execute(statement)
+            self._connections.append(conn)
+            pool.put_nowait(conn)
+
+        self._pool = pool
+        await self._load_locations()
+        await self._load_response_channels()
+        self.bot.add_listener(self._on_facility_create, "on_facility_create")
+        self.bot.add_listener(self._on_facility_modify, "on_facility_modify")
+        self.bot.add_listener(self._on_bulk_facility_delete, "on_bulk_facility_delete")
+        if self.pragmas.wal and self.pragmas.checkpoint_interval > 0:
+            self._checkpoint_task = asyncio.create_task(
+                self._checkpoint_loop(), name="sqlite-checkpoint"
+            )
+        logger.info(
+            "Opened %r connections to database %r", self.pool_size, str(self.db_file)
+        )
+
+    async def close(self) -> None:
+        """Closes every pooled connection"""
+        if self._pool is None:
+            return
+
+        if self._checkpoint_task is not None:
+            self._checkpoint_task.cancel()
+            self._checkpoint_task = None
+        await self.writer.stop()
+
+        self.bot.remove_listener(self._on_facility_create, "on_facility_create")
+        self.bot.remove_listener(self._on_facility_modify, "on_facility_modify")
+        self.bot.remove_listener(
+            self._on_bulk_facility_delete, "on_bulk_facility_delete"
         )
+        self.cache.clear()
+        self.locations.clear()
+        self.response_channels.clear()
+
+        self._pool = None
+        connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                await conn.close()
+            except Exception:
+                logger.exception("Failed closing database connection")
+        logger.info("Closed connections to database %r", str(self.db_file))
+
+    async def _load_locations(self) -> None:
+        locations: dict[int, GuildLocation] = {}
+        for guild_id, forum_id in await self.fetch(
+            """SELECT guild_id, forum_id FROM guild_options"""
+        ):
+            locations[guild_id] = GuildLocation(forum_id=forum_id)
+
+        for guild_id, channel_id, messages, hashes in await self.fetch(
+            """SELECT guild_id, channel_id, messages, hashes FROM list"""
+        ):
+            location = locations.get(guild_id, GuildLocation())
+            locations[guild_id] = location._replace(
+                list_channel_id=channel_id,
+                list_messages=tuple(messages or ()),
+                list_hashes=tuple(hashes or ()),
+            )
+        self.locations = locations
+
+    async def _load_response_channels(self) -> None:
+        rows = await self.fetch("""SELECT guild_id, channel_ids FROM response""")
+        self.response_channels = {
+            guild_id: tuple(channel_ids)
+            for guild_id, channel_ids in rows
+            if channel_ids
+        }
+
+    async def _on_facility_create(self, facility: Facility, *_) -> None:
+        self.cache.add(facility)
+
+    async def _on_facility_modify(self, _: Facility, after: Facility, *__) -> None:
+        self.cache.add(after)
+
+    async def _on_bulk_facility_delete(self, facilities: list[Facility], *_) -> None:
+        self.cache.remove(facilities)
+
+    async def _checkpoint_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.pragmas.checkpoint_interval)
+            try:
+                await self.writer.submit(
+                    "PRAGMA wal_checkpoint(PASSIVE);", method=WriteMethod.SCRIPT
+                )
+            except sqlite3.Error:
+                logger.exception("Failed running WAL checkpoint")
+            else:
+                logger.debug("Ran WAL checkpoint")
+
+    @asynccontextmanager
+    async def acquire(
+        self, timer: QueryTimer | None = None
+    ) -> AsyncIterator[aiosqlite.Connection]:
+        """Hands out a pooled connection, waiting if all are in use
+
+        Any transaction left open by the caller is rolled back before the
+        connection is returned to the pool.
+
+        Args:
+            timer (QueryTimer, optional): Told how long it took to get a connection
+
+        Raises:
+            RuntimeError: Pool has not been opened
+
+        Yields:
+            aiosqlite.Connection: Connection to use
+        """
+        pool = self._pool
+        if pool is None:
+            raise RuntimeError("Database connection pool is not open")
+
+        queue_depth = self._pool_waiters
+        self._pool_waiters += 1
+        try:
+            conn = await pool.get()
+        finally:
+            self._pool_waiters -= 1
+        if timer is not None:
+            timer.acquired(queue_depth)
+
         try:
             yield conn
         finally:
-            await conn.close()
+            conn.row_factory = None
+            try:
+                if conn.in_transaction:
+                    await conn.rollback()
+            except sqlite3.Error:
+                logger.exception("Failed rolling back pooled connection")
+            finally:
+                pool.put_nowait(conn)
 
     async def _execute_query(
         self,
@@ -78,7 +813,19 @@ class Database:
         params: tuple | list[tuple] | None = None,
         fetch_method: FetchMethod = FetchMethod.NONE,
     ) -> Iterable[Row] | Row | None:
-        async with self._connect() as db:
+        if fetch_method is FetchMethod.NONE:
+            if ";" in query:
+                method = WriteMethod.SCRIPT
+            elif isinstance(params, list):
+                method = WriteMethod.EXECUTEMANY
+            else:
+                method = WriteMethod.EXECUTE
+            lastrowid = await self.writer.submit(query, params or (), method)
+            logger.debug("Committed changes to DB, lastrowid %r", lastrowid)
+            return lastrowid
+
+        timer = self.stats.timer(query)
+        async with self.acquire(timer) as db:
             db.row_factory = Row
             if ";" in query:
                 logger.debug("Running executescript statement %r", query)
@@ -99,46 +846,27 @@ class Database:
             match fetch_method:
                 case FetchMethod.ONE:
                     result = await cur.fetchone()
-                    if result:
-                        logger.debug("Fetched row with first column %r", result[0])
-                    else:
-                        logger.debug("Fetched row with no result")
+                    timer.finish(0 if result is None else 1)
                     return result
                 case FetchMethod.ALL:
                     result = await cur.fetchall()
-                    if result:
-                        logger.debug(
-                            "Fetched multiple rows with first column's %r",
-                            [row[0] for row in result],
-                        )
-                    else:
-                        logger.debug("Fetched multiple rows with no result")
+                    timer.finish(len(result))
                     return result
-                case _:
-                    await db.commit()
-                    logger.debug("Committed changes to DB, lastrowid %r", cur.lastrowid)
-                    return cur.lastrowid
 
     async def fetch(
         self,
         query: str,
         *params,
     ) -> Iterable[Row]:
-        async with self._connect() as db:
+        timer = self.stats.timer(query)
+        async with self.acquire(timer) as db:
             logger.debug(
                 "Running fetchall statement %r with parameters %r",
                 query,
                 params,
             )
             result = await db.execute_fetchall(query, params)
-
-            if result:
-                logger.debug(
-                    "Fetched multiple rows with first column's %r",
-                    [row[0] for row in result],
-                )
-            else:
-                logger.debug("Fetched multiple rows with no result")
+            timer.finish(len(result))
             return result or []
 
     async def fetch_one(
@@ -146,7 +874,8 @@ class Database:
         query: str,
         *params,
     ) -> Row | None:
-        async with self._connect() as db:
+        timer = self.stats.timer(query)
+        async with self.acquire(timer) as db:
             logger.debug(
                 "Running fetch statement %r with parameters %r",
                 query,
@@ -154,14 +883,7 @@ class Database:
             )
             cur = await db.execute(query, params)
             result = await cur.fetchone()
-
-            if result:
-                logger.debug(
-                    "Fetched row with first column %r",
-                    result[0],
-                )
-            else:
-                logger.debug("Fetched row with no result")
+            timer.finish(0 if result is None else 1)
             return result
 
     async def execute(
@@ -169,77 +891,25 @@ class Database:
         query: str,
         *params,
     ) -> int:
-        async with self._connect() as db:
-            logger.debug(
-                "Running execute statement %r with parameters %r", query, params
-            )
-            cur = await db.execute(query, params)
-            await db.commit()
-            logger.debug("Committed changes to database")
+        logger.debug("Queueing execute statement %r with parameters %r", query, params)
+        lastrowid = await self.writer.submit(query, params)
+        logger.debug("Committed changes to database")
+
+        return lastrowid
 
-            return cur.lastrowid
+    async def executemany(self, query: str, params: list[tuple]) -> None:
+        logger.debug(
+            "Queueing executemany statement %r with parameters %r", query, params
+        )
+        await self.writer.submit(query, params, WriteMethod.EXECUTEMANY)
 
     async def executemultiple(self, query: str):
-        async with self._connect() as db:
-            await db.executescript(query)
-            await db.commit()
+        await self.writer.submit(query, method=WriteMethod.SCRIPT)
 
-    async def create(self):
-        sql = """
-                CREATE TABLE "facilities" (
-                    "id_"	INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE,
-                    "name"	TEXT,
-                    "description"	TEXT,
-                    "region"	TEXT,
-                    "coordinates"	TEXT,
-                    "marker"	INTEGER,
-                    "maintainer"	TEXT,
-                    "author"	INTEGER,
-                    "item_services"	ITEM_SERVICES,
-                    "vehicle_services"	VEHICLE_SERVICES,
-                    "creation_time"	INTEGER,
-                    "guild_id"	INTEGER,
-                    "image_url"	TEXT,
-                    "thread_id"	INTEGER,
-                );
-                CREATE TABLE "blacklist" (
-                    "object_id"	INTEGER UNIQUE,
-                    "reason"	TEXT,
-                    PRIMARY KEY("object_id")
-                );
-                CREATE TABLE "list" (
-                    "guild_id"	INTEGER UNIQUE,
-                    "channel_id"	INTEGER,
-                    "messages"	messages,
-                    PRIMARY KEY("guild_id")
-                );
-                CREATE TABLE "command_stats" (
-                    "name"	TEXT NOT NULL,
-                    "run_count"	INTEGER NOT NULL,
-                    "guild_id"	INTEGER NOT NULL
-                );
-                CREATE UNIQUE INDEX "command_index" ON "command_stats" (
-                    "name",
-                    "guild_id"
-                );
-                CREATE TABLE "response" (
-                    "guild_id"	INTEGER UNIQUE,
-                    "channel_ids"	CHANNEL_IDS,
-                    PRIMARY KEY("guild_id")
-                );
-                CREATE TABLE "user_options" (
-                    "user_id"	INTEGER,
-                    "ephemeral"	BOOL,
-                    PRIMARY KEY("user_id")
-                );
-                CREATE TABLE "guild_options" (
-                    "guild_id"	INTEGER,
-                    "forum_id"	INTEGER,
-                    PRIMARY KEY("guild_id")
-                );
-            """
-        await self.executemultiple(sql)
-        logger.info("Created database %r", str(self.db_file))
+    async def migrate(self) -> None:
+        """Brings the schema up to date by running any pending :data:`MIGRATIONS`"""
+        version = await self.writer.migrate(MIGRATIONS)
+        logger.info("Database %r at schema version %r", str(self.db_file), version)
 
     async def ephemeral_preference(self, user_id: int) -> bool | None:
         query = """SELECT ephemeral FROM user_options WHERE user_id = ?"""
@@ -253,12 +923,87 @@ class Database:
         return None
 
     async def get_all_facilities(self) -> List[Facility]:
-        async with self._connect() as db:
+        return [facility async for facility in self.iter_facilities()]
+
+    async def iter_facilities(
+        self, query: FacilityQuery | None = None, batch_size: int = 256
+    ) -> AsyncIterator[Facility]:
+        """Streams facilities matching a query without loading every row at once
+
+        Always reads from the database, a pooled connection is held until the
+        iterator is exhausted or closed so avoid slow work between items.
+
+        Args:
+            query (FacilityQuery, optional): Filters, all facilities if not passed
+            batch_size (int, optional): Rows fetched at a time. Defaults to 256.
+
+        Yields:
+            Facility: Facilities in the order of the query
+        """
+        sql, params = (query or FacilityQuery()).to_sql()
+        timer = self.stats.timer(sql)
+        count = 0
+        async with self.acquire(timer) as db:
+            db.row_factory = Row
+            async with db.execute(sql, params) as cur:
+                while rows := await cur.fetchmany(batch_size):
+                    count += len(rows)
+                    for row in rows:
+                        yield Facility.from_row(row)
+        # includes time spent by the consumer between batches
+        timer.finish(count)
+
+    @asynccontextmanager
+    async def stream_facilities(
+        self, query: FacilityQuery, batch_size: int = 256
+    ) -> AsyncIterator[tuple[int, AsyncIterator[Facility]]]:
+        """Counts and streams facilities matching a query from a single snapshot,
+        so the count always agrees with the facilities streamed
+
+        Always reads from the database, a pooled connection is held until the
+        context exits so avoid slow work between items.
+
+        Args:
+            query (FacilityQuery): Filters, limit and offset aren't counted
+            batch_size (int, optional): Rows fetched at a time. Defaults to 256.
+
+        Yields:
+            tuple[int, AsyncIterator[Facility]]: Amount of facilities and the facilities in the order of the query
+        """
+        sql, params = query.to_sql()
+        where, where_params = query.where()
+        timer = self.stats.timer(sql)
+        count = 0
+        async with self.acquire(timer) as db:
+            # both statements read inside one transaction, writes committed
+            # in between aren't seen by either
+            await db.execute("BEGIN")
+            async with db.execute(
+                f"SELECT COUNT(*) FROM facilities{where}", where_params
+            ) as cur:
+                (total,) = await cur.fetchone()
             db.row_factory = Row
-            results = await db.execute_fetchall("SELECT * FROM facilities")
-            return [Facility(**row) for row in results]
+
+            async def facilities() -> AsyncIterator[Facility]:
+                nonlocal count
+                async with db.execute(sql, params) as cur:
+                    while rows := await cur.fetchmany(batch_size):
+                        count += len(rows)
+                        for row in rows:
+                            yield Facility.from_row(row)
+
+            yield total, facilities()
+        timer.finish(count)
 
     async def add_facility(self, facility: Facility) -> int:
+        """Inserts a new facility, then sets its ID and marks it clean
+
+        Args:
+            facility (Facility): Facility to insert
+
+        Returns:
+            int: ID of the new facility
+        """
         values = (
             facility.name,
             facility.description,
@@ -277,42 +1022,202 @@ class Database:
             """INSERT INTO facilities (name, description, region, coordinates, marker, maintainer, author, item_services, vehicle_services, creation_time, guild_id, image_url) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             values,
         )
+        facility.id_ = lastrowid
+        facility.mark_clean()
         return lastrowid
 
     async def get_facilities(
-        self, search_dict: Dict[str, str | int] | None = None
+        self, query: FacilityQuery | None = None
     ) -> List[Facility]:
-        if not search_dict:
+        """Gets facilities matching a query, queries scoped to a guild are served
+        from :attr:`cache`
+
+        The returned facilities are shared with the cache, they should only be
+        changed when the change is also written and dispatched.
+
+        Args:
+            query (FacilityQuery, optional): Filters, all facilities if not passed
+
+        Returns:
+            List[Facility]: Facilities ordered by ID, or by region then ID if
+            :attr:`FacilityQuery.order_by_region` is set
+        """
+        if query is None:
             return await self.get_all_facilities()
-        sql = "SELECT * FROM facilities WHERE "
-        sql += "AND".join(search_dict)
+
+        if query.guild_id is not None:
+            facilities = await self.get_guild_facilities(query.guild_id)
+            matched = [facility for facility in facilities if query.matches(facility)]
+            if query.order_by_region:
+                # stable, so facilities of a region stay ordered by ID
+                matched.sort(key=attrgetter("region"))
+            end = None if query.limit is None else query.offset + query.limit
+            return matched[query.offset : end]
+
+        return [facility async for facility in self.iter_facilities(query)]
+
+    async def count_facilities(self, query: FacilityQuery) -> int:
+        """Counts facilities matching a query, ignores limit and offset
+
+        Args:
+            query (FacilityQuery): Filters
+
+        Returns:
+            int: Amount of facilities
+        """
+        cached = None if query.guild_id is None else self.cache.get(query.guild_id)
+        if cached is not None:
+            return sum(1 for facility in cached if query.matches(facility))
+
+        where, params = query.where()
+        row = await self.fetch_one(f"SELECT COUNT(*) FROM facilities{where}", *params)
+        return row[0] if row else 0
+
+    async def get_guild_facilities(self, guild_id: int) -> List[Facility]:
+        """Gets every facility of a guild, loading it into :attr:`cache` if needed
+
+        Args:
+            guild_id (int): Guild ID
+
+        Returns:
+            List[Facility]: Facilities ordered by ID
+        """
+        cached = self.cache.get(guild_id)
+        if cached is not None:
+            return cached
+
+        # share one query between concurrent misses for the same guild
+        task = self._cache_loads.get(guild_id)
+        if task is None:
+            task = asyncio.create_task(self._load_guild(guild_id))
+            self._cache_loads[guild_id] = task
+            task.add_done_callback(lambda _: self._cache_loads.pop(guild_id, None))
+        return list(await asyncio.shield(task))
+
+    async def _load_guild(self, guild_id: int) -> List[Facility]:
+        version = self.cache.version(guild_id)
+        query = FacilityQuery(guild_id=guild_id)
+        facilities = [facility async for facility in self.iter_facilities(query)]
+        self.cache.set(guild_id, facilities, version)
+        return facilities
+
+    async def query_plan(self, query: FacilityQuery) -> list[str]:
+        """Explains how sqlite will run a facility query, useful to check index usage
+
+        Args:
+            query (FacilityQuery): Query to explain
+
+        Returns:
+            list[str]: Each step of the query plan
+        """
+        sql, params = query.to_sql()
+        rows = await self.fetch(f"EXPLAIN QUERY PLAN {sql}", *params)
+        return [row[3] for row in rows]
+
+    async def autocomplete_facilities(
+        self, guild_id: int, value: str, limit: int = 12
+    ) -> list[tuple[int, str]]:
+        """Finds facilities whose name has words starting with the words typed
+
+        Args:
+            guild_id (int): Guild to search in
+            value (str): Text typed so far
+            limit (int, optional): Maximum amount of results. Defaults to 12.
+
+        Returns:
+            list[tuple[int, str]]: ID and name of each facility, best match first
+        """
+        match = fts_query(value, "name")
+        if match is None:
+            query = """SELECT id_, name FROM facilities WHERE guild_id == ? ORDER BY name COLLATE NOCASE LIMIT ?"""
+            return await self.fetch(query, guild_id, limit)
+
+        query = """SELECT facilities.id_, facilities.name FROM facilities_fts JOIN facilities ON facilities.id_ == facilities_fts.rowid WHERE facilities_fts MATCH ? AND facilities.guild_id == ? ORDER BY bm25(facilities_fts) LIMIT ?"""
+        return await self.fetch(query, match, guild_id, limit)
+
+    async def search_facilities(
+        self, guild_id: int, text: str, limit: int = 25
+    ) -> List[Facility]:
+        """Full text search over name, description, maintainer and marker
+
+        Args:
+            guild_id (int): Guild to search in
+            text (str): Words to search for, matching the start of words
+            limit (int, optional): Maximum amount of results. Defaults to 25.
+
+        Returns:
+            List[Facility]: Facilities ranked by relevance, name matches weighted highest
+        """
+        match = fts_query(text)
+        if match is None:
+            return []
+
+        query = """SELECT facilities.* FROM facilities_fts JOIN facilities ON facilities.id_ == facilities_fts.rowid WHERE facilities_fts MATCH ? AND facilities.guild_id == ? ORDER BY bm25(facilities_fts, 10.0, 2.0, 1.0, 1.0) LIMIT ?"""
         rows = await self._execute_query(
-            sql, tuple(search_dict.values()), FetchMethod.ALL
+            query, (match, guild_id, limit), FetchMethod.ALL
         )
-
-        return [Facility(**row) for row in rows]
+        return [Facility.from_row(row) for row in rows]
 
     async def get_facility_ids(
-        self, ids: list[int], guild_id: int | None = None
-    ) -> List[Facility]:
-        sql = """SELECT * FROM facilities WHERE id_ == ?"""
-        if guild_id:
-            sql += """AND guild_id == ?"""
-        facility_list = []
-        for lookup_id in ids:
-            values = [lookup_id]
-            if guild_id:
-                values.append(guild_id)
-            row = await self._execute_query(
-                sql,
-                tuple(values),
-                FetchMethod.ONE,
+        self, ids: Iterable[int], guild_id: int | None = None
+    ) -> tuple[List[Facility], List[int]]:
+        """Looks up multiple facilities by ID in as few queries as possible
+
+        Args:
+            ids (Iterable[int]): IDs to look up, duplicates are ignored
+            guild_id (int, optional): Only return facilities from this guild
+
+        Returns:
+            tuple[List[Facility], List[int]]: Facilities found in the order requested and IDs that weren't found
+        """
+        unique_ids = list(dict.fromkeys(ids))
+        found: dict[int, Facility] = {}
+
+        async with self.acquire() as db:
+            db.row_factory = Row
+            for start in range(0, len(unique_ids), MAX_ID_CHUNK):
+                chunk = unique_ids[start : start + MAX_ID_CHUNK]
+                # pad to a power of two so only a handful of distinct statements exist
+                size = 1 << (len(chunk) - 1).bit_length()
+                chunk += [chunk[-1]] * (size - len(chunk))
+
+                sql = f"""SELECT * FROM facilities WHERE id_ IN ({", ".join("?" * size)})"""
+                params = tuple(chunk)
+                if guild_id:
+                    sql += """ AND guild_id == ?"""
+                    params += (guild_id,)
+
+                timer = self.stats.timer(sql)
+                rows = await db.execute_fetchall(sql, params)
+                timer.finish(len(rows))
+                for row in rows:
+                    facility = Facility.from_row(row)
+                    found[facility.id_] = facility
+
+        facilities = [found[id_] for id_ in unique_ids if id_ in found]
+        missing = [id_ for id_ in unique_ids if id_ not in found]
+        return facilities, missing
+
+    async def get_thread_ids(self, ids: Iterable[int]) -> dict[int, int]:
+        """Reads the stored thread IDs of facilities, skipping the cache
+
+        Args:
+            ids (Iterable[int]): Facility IDs
+
+        Returns:
+            dict[int, int]: Thread ID by facility ID, facilities without a thread are left out
+        """
+        unique_ids = list(dict.fromkeys(ids))
+        thread_ids: dict[int, int] = {}
+        for start in range(0, len(unique_ids), MAX_ID_CHUNK):
+            chunk = unique_ids[start : start + MAX_ID_CHUNK]
+            rows = await self._execute_query(
+                f"""SELECT id_, thread_id FROM facilities WHERE thread_id IS NOT NULL AND id_ IN ({", ".join("?" * len(chunk))})""",
+                tuple(chunk),
+                FetchMethod.ALL,
             )
-            if not row:
-                continue
-            facility = Facility(**row)
-            facility_list.append(facility)
-        return facility_list
+            thread_ids.update((row[0], row[1]) for row in rows)
+        return thread_ids
 
     async def get_facility_id(self, id_: int) -> Facility | None:
         row = await self._execute_query(
@@ -320,27 +1225,59 @@ class Database:
         )
         if not row:
             return None
-        return Facility(**row)
+        return Facility.from_row(row)
 
     async def remove_facilities(self, facilities: list[Facility]) -> None:
         ids = [(facility.id_,) for facility in facilities]
         await self._execute_query("""DELETE FROM facilities WHERE id_ == ?""", ids)
 
-    async def update_facility(self, facility: Facility) -> None:
-        values = (
-            facility.name,
-            facility.description,
-            facility.maintainer,
-            facility.item_services,
-            facility.vehicle_services,
-            facility.image_url,
-            facility.thread_id,
-            facility.id_,
+    async def update_facility(self, facility: Facility) -> bool:
+        """Writes the columns of a facility that changed since it was loaded
+
+        Args:
+            facility (Facility): Facility to update
+
+        Returns:
+            bool: Whether anything was written
+        """
+        fields = facility.dirty_fields()
+        if not fields:
+            return False
+
+        # column names only ever come from TRACKED_FIELDS
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        values = tuple(getattr(facility, field) for field in fields)
+        await self._execute_query(
+            f"""UPDATE facilities SET {assignments} WHERE id_ == ?""",
+            values + (facility.id_,),
         )
+        facility.mark_clean(*fields)
+        return True
+
+    async def update_thread_ids(self, facilities: Iterable[Facility]) -> int:
+        """Writes changed thread IDs of many facilities in one statement
+
+        Args:
+            facilities (Iterable[Facility]): Facilities, unchanged thread IDs are skipped
+
+        Returns:
+            int: Amount of facilities written
+        """
+        changed = [
+            facility
+            for facility in facilities
+            if "thread_id" in facility.dirty_fields()
+        ]
+        if not changed:
+            return 0
+
         await self._execute_query(
-            """UPDATE facilities SET name = ?, description = ?, maintainer = ?, item_services = ?, vehicle_services = ?, image_url = ?, thread_id = ? WHERE id_ == ?""",
-            values,
+            """UPDATE facilities SET thread_id = ? WHERE id_ == ?""",
+            [(facility.thread_id, facility.id_) for facility in changed],
         )
+        for facility in changed:
+            facility.mark_clean("thread_id")
+        return len(changed)
 
     async def reset(self) -> None:
         sql = """
@@ -349,6 +1286,7 @@ class Database:
             VACUUM;
         """
         await self._execute_query(sql)
+        self.cache.clear()
         logger.info("Removed all entries from facilities and executed VACUUM")
 
     async def set_roles(self, role_ids: list[int], guild_id: int) -> None:
@@ -370,15 +1308,97 @@ class Database:
         )
         return [row[0] for row in rows]
 
+    async def set_response_channels(
+        self, guild_id: int, channel_ids: Iterable[int]
+    ) -> None:
+        """Replaces the channels a guild's responder is enabled in
+
+        Args:
+            guild_id (int): Guild ID
+            channel_ids (Iterable[int]): Channel IDs in the order they were added, removes the guild's row if empty
+        """
+        channel_ids = list(dict.fromkeys(channel_ids))
+        if channel_ids:
+            await self._execute_query(
+                """INSERT OR REPLACE INTO response VALUES (?,?)""",
+                (guild_id, AdaptableList(channel_ids)),
+            )
+            self.response_channels[guild_id] = tuple(channel_ids)
+        else:
+            await self._execute_query(
+                """DELETE FROM response WHERE guild_id = ?""", (guild_id,)
+            )
+            self.response_channels.pop(guild_id, None)
+
+    def guild_location(self, guild_id: int) -> GuildLocation:
+        """Gets where a guild's forum and list are without querying the database
+
+        Args:
+            guild_id (int): Guild ID
+
+        Returns:
+            GuildLocation: Location, every field empty if nothing is set up
+        """
+        return self.locations.get(guild_id) or GuildLocation()
+
+    async def set_forum(self, guild_id: int, forum_id: int) -> None:
+        await self._execute_query(
+            """INSERT OR REPLACE INTO guild_options (guild_id, forum_id) VALUES(?,?)""",
+            (guild_id, forum_id),
+        )
+        self.locations[guild_id] = self.guild_location(guild_id)._replace(
+            forum_id=forum_id
+        )
+
+    async def start_forum_backfill(self, guild_id: int, forum_id: int) -> None:
+        await self._execute_query(
+            """INSERT OR REPLACE INTO forum_backfill (guild_id, forum_id) VALUES (?, ?)""",
+            (guild_id, forum_id),
+        )
+
+    async def finish_forum_backfill(self, guild_id: int) -> None:
+        await self._execute_query(
+            """DELETE FROM forum_backfill WHERE guild_id == ?""", (guild_id,)
+        )
+
+    async def pending_forum_backfills(self) -> list[tuple[int, int]]:
+        """Gets forum backfills that didn't finish
+
+        Returns:
+            list[tuple[int, int]]: Guild and forum ID of each backfill
+        """
+        rows = await self.fetch("""SELECT guild_id, forum_id FROM forum_backfill""")
+        return [(guild_id, forum_id) for guild_id, forum_id in rows]
+
     async def set_list(
         self,
         guild: Guild,
-        channel: TextChannel,
+        channel: TextChannel | Thread,
         messages: list[int],
+        hashes: list[int] | None = None,
     ) -> None:
+        """Stores where a guild's list was posted
+
+        Args:
+            guild (Guild): Guild of the list
+            channel (TextChannel | Thread): Channel the list is in
+            messages (list[int]): Message IDs in order
+            hashes (list[int], optional): :func:`content_hash` of the embed in each
+                message, messages without one are edited on the next update
+        """
         await self._execute_query(
-            """INSERT OR REPLACE INTO list (guild_id, channel_id, messages) VALUES (?, ?, ?)""",
-            (guild.id, channel.id, AdaptableList(messages)),
+            """INSERT OR REPLACE INTO list (guild_id, channel_id, messages, hashes) VALUES (?, ?, ?, ?)""",
+            (
+                guild.id,
+                channel.id,
+                AdaptableList(messages),
+                AdaptableList(hashes) if hashes else None,
+            ),
+        )
+        self.locations[guild.id] = self.guild_location(guild.id)._replace(
+            list_channel_id=channel.id,
+            list_messages=tuple(messages),
+            list_hashes=tuple(hashes or ()),
         )
 
     async def remove_list(
@@ -389,10 +1409,24 @@ class Database:
             """DELETE FROM list WHERE guild_id == ?""",
             (guild.id,),
         )
-
-    async def get_list(self, guild: Guild) -> Row | None:
-        return await self._execute_query(
-            """SELECT channel_id, messages FROM list WHERE guild_id == ?""",
-            (guild.id,),
-            FetchMethod.ONE,
+        location = self.guild_location(guild.id)._replace(
+            list_channel_id=None, list_messages=(), list_hashes=()
         )
+        if location.forum_id is None:
+            self.locations.pop(guild.id, None)
+        else:
+            self.locations[guild.id] = location
+
+    async def get_list(self, guild: Guild) -> tuple[int, list[int]] | None:
+        """Gets the channel and messages of a guild's list from :attr:`locations`
+
+        Args:
+            guild (Guild): Guild to get the list of
+
+        Returns:
+            tuple[int, list[int]] | None: Channel ID and message IDs, None if not set
+        """
+        location = self.guild_location(guild.id)
+        if location.list_channel_id is None:
+            return None
+        return location.list_channel_id, list(location.list_messages)
@@ -31,10 +31,8 @@ class FacilityTransformer(app_commands.Transformer):
     async def autocomplete(
         self, interaction: GuildInteraction, value: str, /
     ) -> list[app_commands.Choice[str]]:
-        prefixed_value = "%" + value + "%"
-        query = """SELECT id_, name FROM facilities WHERE guild_id=? AND LOWER(name) LIKE ? LIMIT 12"""
-        results: list[tuple[int, str]] = await interaction.client.db.fetch(
-            query, interaction.guild_id, prefixed_value.lower()
+        results = await interaction.client.db.autocomplete_facilities(
+            interaction.guild_id, value
         )
         return [
             app_commands.Choice(name=f"{id_} - {name}", value=str(id_))
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from time import time
 from copy import copy
+from functools import partial
 from typing import TYPE_CHECKING
 
 from discord import ui, User, Member, ButtonStyle, Button, ChannelType, utils
@@ -12,7 +13,8 @@ from .facility import Facility
 from .mixins import InteractionCheckedView
 from .embeds import FeedbackEmbed, FeedbackType
 from .flags import ItemServiceFlags, VehicleServiceFlags
-from .embeds import create_list
+from .embeds import create_list, content_hash
+from .outbound import Priority
 
 
 if TYPE_CHECKING:
@@ -38,11 +40,9 @@ class ChannelSelectDropdown(ui.ChannelSelect):
     view: ChannelSelectView
 
     async def callback(self, interaction: GuildInteraction):
-        res = await interaction.client.db.fetch_one(
-            """SELECT channel_id, messages FROM list WHERE guild_id = ?""",
-            interaction.guild_id,
-        )
+        res = await interaction.client.db.get_list(interaction.guild)
         selected_channel = self.values[0]
+        outbound = interaction.client.outbound
         if res:
             cid, messages = res
             if cid == selected_channel.id:
@@ -56,7 +56,11 @@ class ChannelSelectDropdown(ui.ChannelSelect):
                 for mid in messages:
                     message = channel.get_partial_message(mid)
                     try:
-                        await message.delete()
+                        await outbound.run(
+                            message.delete,
+                            priority=Priority.INTERACTIVE,
+                            route=channel.id,
+                        )
                     except NotFound:
                         pass
 
@@ -67,7 +71,11 @@ class ChannelSelectDropdown(ui.ChannelSelect):
         channel = selected_channel.resolve()
         for embed in facility_list:
             try:
-                message = await channel.send(embed=embed)
+                message = await outbound.run(
+                    partial(channel.send, embed=embed),
+                    priority=Priority.INTERACTIVE,
+                    route=channel.id,
+                )
             except Forbidden:
                 embed = FeedbackEmbed(
                     "No permission to send messages in selected channel",
@@ -76,8 +84,11 @@ class ChannelSelectDropdown(ui.ChannelSelect):
                 return await interaction.response.edit_message(embed=embed)
             messages.append(message.id)
 
+        hashes = [content_hash(embed) for embed in facility_list]
         try:
-            await interaction.client.db.set_list(interaction.guild, channel, messages)
+            await interaction.client.db.set_list(
+                interaction.guild, channel, messages, hashes
+            )
         except Exception as exc:
             embed = FeedbackEmbed(
                 f"Failed to set list channel\n```py\n{exc}\n```", FeedbackType.ERROR
@@ -136,10 +147,15 @@ class SetDynamicList(InteractionCheckedView):
         embeds = interaction.message.embeds
 
         forum = interaction.guild.get_channel(self.forum_id)
+        outbound = interaction.client.outbound
         pinned_thread = utils.get(forum.threads, flags__pinned=True)
         if pinned_thread:
             try:
-                await pinned_thread.delete()
+                await outbound.run(
+                    pinned_thread.delete,
+                    priority=Priority.INTERACTIVE,
+                    route=forum.id,
+                )
             except Forbidden:
                 embed = FeedbackEmbed(
                     "No permission to manage forum, must have `Manage Posts`",
@@ -154,10 +170,13 @@ class SetDynamicList(InteractionCheckedView):
         facility_list = await create_list(
             self.facilities, interaction.guild, interaction.client
         )
+        hashes = [content_hash(embed) for embed in facility_list]
         initial_embed = facility_list.pop(0)
         try:
-            thread, message = await forum.create_thread(
-                name="Index", embed=initial_embed
+            thread, message = await outbound.run(
+                partial(forum.create_thread, name="Index", embed=initial_embed),
+                priority=Priority.INTERACTIVE,
+                route=forum.id,
             )
         except Forbidden:
             embed = FeedbackEmbed(
@@ -172,13 +191,23 @@ class SetDynamicList(InteractionCheckedView):
 
         messages = [message.id]
 
-        await thread.edit(locked=True, pinned=True)
+        await outbound.run(
+            partial(thread.edit, locked=True, pinned=True),
+            priority=Priority.INTERACTIVE,
+            route=forum.id,
+        )
         for embed in facility_list:
-            message = await thread.send(embed=embed)
+            message = await outbound.run(
+                partial(thread.send, embed=embed),
+                priority=Priority.INTERACTIVE,
+                route=thread.id,
+            )
             messages.append(message.id)
 
         try:
-            await interaction.client.db.set_list(interaction.guild, thread, messages)
+            await interaction.client.db.set_list(
+                interaction.guild, thread, messages, hashes
+            )
         except Exception as exc:
             embed = FeedbackEmbed(
                 f"Failed to set list channel\n```py\n{exc}\n```", FeedbackType.ERROR
@@ -268,13 +297,11 @@ class ResetView(InteractionCheckedView):
             if events_cog is None:
                 return
 
-            query = """SELECT guild_id FROM list"""
-            rows = await interaction.client.db.fetch(query)
-            for row in rows:
-                guild_id = row and row[0]
-                guild = interaction.client.get_guild(guild_id)
-
-            guilds = [interaction.client.get_guild(row[0]) for row in rows if row]
+            guilds = [
+                interaction.client.get_guild(guild_id)
+                for guild_id, location in interaction.client.db.locations.items()
+                if location.list_channel_id is not None
+            ]
             filtered_guilds = list(filter(None, guilds))
 
             if not filtered_guilds:
@@ -424,7 +451,6 @@ class CreateFacilityView(BaseServicesSelectView):
             embed = FeedbackEmbed(
                 f"Created facility with ID: `{facility_id}`", FeedbackType.SUCCESS
             )
-            self.facility.id_ = facility_id
             await followup.send(
                 embed=embed,
                 ephemeral=True,
@@ -110,6 +110,13 @@ logging_dict = {
             "mode": "a",
             "formatter": "slim",
         },
+        "slow_query_log": {
+            "class": "logging.FileHandler",
+            "filename": LOG_DIR / "slow_query.log",
+            "encoding": "utf-8",
+            "mode": "a",
+            "formatter": "slim",
+        },
         "guild": {
             "class": "__main__.GuildHandler",
             "formatter": "discord_message",
@@ -140,6 +147,11 @@ logging_dict = {
             "handlers": ["guild_event_log"],
             "propagate": False,
         },
+        "slow_query": {
+            "level": logging.INFO,
+            "handlers": ["slow_query_log"],
+            "propagate": False,
+        },
         "facility_event": {
             "level": logging.INFO,
             "handlers": ["facility_event_log", "guild"],
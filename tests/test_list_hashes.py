@@ -0,0 +1,167 @@
+import asyncio
+import itertools
+import sqlite3
+
+from discord import Embed, NotFound, RawMessageDeleteEvent
+
+from cogs.events import Events
+from cogs.utils.embeds import content_hash
+from cogs.utils.outbound import OutboundQueue
+from cogs.utils.sqlite import Database
+
+
+class Tree:
+    async def get_or_fetch_app_command(self, name):
+        return None
+
+
+class Bot:
+    tree = Tree()
+
+    def add_listener(self, func, name):
+        pass
+
+    def remove_listener(self, func, name):
+        pass
+
+
+class Guild:
+    id = 1
+    name = "Guild"
+
+
+class Channel:
+    id = 2
+
+
+class Response:
+    status = 404
+    reason = "Not Found"
+
+
+class Message:
+    def __init__(self, channel, id):
+        self.channel = channel
+        self.id = id
+
+    async def edit(self, embed):
+        if self.id not in self.channel.messages:
+            raise NotFound(Response(), "Unknown Message")
+        self.channel.messages[self.id] = embed
+
+    async def delete(self):
+        if self.channel.messages.pop(self.id, None) is None:
+            raise NotFound(Response(), "Unknown Message")
+
+
+class ListChannel(Channel):
+    def __init__(self):
+        self.messages = {}
+        self.last_message_id = None
+        self._ids = itertools.count(100)
+
+    async def send(self, embed):
+        message = Message(self, next(self._ids))
+        self.messages[message.id] = embed
+        self.last_message_id = message.id
+        return message
+
+    def get_partial_message(self, id):
+        return Message(self, id)
+
+
+async def _open(path):
+    db = Database(Bot(), path)
+    await db.open()
+    return db
+
+
+def test_content_hash_fits_signed_integer():
+    for index in range(200):
+        embed = Embed(title=f"Facility list ({index})", description="x" * index)
+        assert 0 <= content_hash(embed) < 1 << 63
+
+
+def test_single_message_list_survives_restart(tmp_path):
+    path = tmp_path / "data.sqlite"
+    largest_hash = (1 << 63) - 1
+
+    async def run():
+        db = await _open(path)
+        try:
+            await db.set_list(Guild(), Channel(), [1200000000000000000], [largest_hash])
+        finally:
+            await db.close()
+
+        db = await _open(path)
+        try:
+            location = db.guild_location(Guild.id)
+        finally:
+            await db.close()
+        assert location.list_messages == (1200000000000000000,)
+        assert location.list_hashes == (largest_hash,)
+
+    asyncio.run(run())
+
+
+def test_real_hashes_are_dropped_on_migration(tmp_path):
+    path = tmp_path / "data.sqlite"
+
+    async def create():
+        db = await _open(path)
+        await db.close()
+
+    asyncio.run(create())
+
+    # what a single message list with a hash of 2^63 or more used to store
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO list (guild_id, channel_id, messages, hashes) VALUES (1, 2, '3', 1.8e19)"
+    )
+    conn.execute("PRAGMA user_version = 5")
+    conn.commit()
+    conn.close()
+
+    async def reopen():
+        db = await _open(path)
+        try:
+            location = db.guild_location(Guild.id)
+        finally:
+            await db.close()
+        assert location.list_messages == (3,)
+        assert location.list_hashes == ()
+
+    asyncio.run(reopen())
+
+
+def test_deleted_list_message_is_reposted(tmp_path):
+    async def run():
+        bot = Bot()
+        bot.db = await _open(tmp_path / "data.sqlite")
+        bot.outbound = OutboundQueue()
+        bot.outbound.start()
+        channel = ListChannel()
+        bot.get_channel = lambda id: channel
+        bot.get_guild = lambda id: Guild()
+        events = Events(bot)
+        try:
+            await bot.db.set_list(Guild(), channel, [])
+            await events.update_list(Guild())
+            (message_id,) = bot.db.guild_location(Guild.id).list_messages
+
+            # the content is unchanged, so only the delete event can tell
+            del channel.messages[message_id]
+            payload = RawMessageDeleteEvent(
+                {"id": message_id, "channel_id": channel.id, "guild_id": Guild.id}
+            )
+            await events.on_raw_message_delete(payload)
+            await events.refresh_scheduler.flush()
+
+            location = bot.db.guild_location(Guild.id)
+            assert location.list_messages != (message_id,)
+            assert list(location.list_messages) == list(channel.messages)
+        finally:
+            await bot.outbound.close()
+            await bot.db.close()
+
+    asyncio.run(run())
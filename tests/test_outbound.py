@@ -0,0 +1,98 @@
+import asyncio
+
+from discord import DiscordServerError
+
+from cogs.utils.outbound import OutboundQueue, Priority
+
+
+class Response:
+    status = 503
+    reason = "Service Unavailable"
+    headers = {}
+
+
+def test_busy_route_does_not_hold_workers():
+    async def main():
+        queue = OutboundQueue(workers=4)
+        queue.start()
+        release = asyncio.Event()
+        try:
+
+            async def blocked():
+                await release.wait()
+
+            async def interactive():
+                return queue.stats().queued[Priority.FORUM_SYNC]
+
+            syncs = [
+                queue.submit(blocked, priority=Priority.FORUM_SYNC, route=1)
+                for _ in range(8)
+            ]
+            await asyncio.sleep(0)
+            # only finishes if a worker is free while route 1 is still blocked
+            still_queued = await asyncio.wait_for(
+                queue.run(interactive, priority=Priority.INTERACTIVE, route=2), 5
+            )
+            assert still_queued == 7
+            release.set()
+            await asyncio.gather(*syncs)
+        finally:
+            await queue.close()
+
+    asyncio.run(main())
+
+
+def test_route_runs_one_call_at_a_time():
+    async def main():
+        queue = OutboundQueue(workers=4)
+        queue.start()
+        running = []
+        try:
+
+            async def call():
+                running.append(1)
+                assert len(running) == 1
+                await asyncio.sleep(0.01)
+                running.pop()
+
+            await asyncio.gather(
+                *(
+                    queue.submit(call, priority=priority, route=1)
+                    for priority in (Priority.LIST_SYNC, Priority.INTERACTIVE) * 3
+                )
+            )
+            assert queue.queue_depth == 0
+            assert not queue._routes
+        finally:
+            await queue.close()
+
+    asyncio.run(main())
+
+
+def test_server_errors_only_retried_when_idempotent():
+    async def main():
+        queue = OutboundQueue(backoff=0.01)
+        queue.start()
+        attempts = []
+        try:
+
+            async def call():
+                attempts.append(1)
+                raise DiscordServerError(Response(), "unavailable")
+
+            for idempotent, expected in ((False, 1), (True, queue.max_attempts)):
+                attempts.clear()
+                try:
+                    await queue.run(
+                        call,
+                        priority=Priority.LIST_SYNC,
+                        route=1,
+                        idempotent=idempotent,
+                    )
+                except DiscordServerError:
+                    pass
+                assert len(attempts) == expected
+        finally:
+            await queue.close()
+
+    asyncio.run(main())
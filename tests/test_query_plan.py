@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from cogs.utils.sqlite import Database, FacilityQuery
+
+
+class Bot:
+    def add_listener(self, func, name):
+        pass
+
+    def remove_listener(self, func, name):
+        pass
+
+
+@pytest.mark.parametrize(
+    ("query", "index"),
+    [
+        (
+            FacilityQuery(guild_id=1, region="Deadlands"),
+            "facilities_guild_region_index",
+        ),
+        (
+            FacilityQuery(guild_id=1, order_by_region=True),
+            "facilities_guild_region_index",
+        ),
+        (FacilityQuery(guild_id=1, author=2), "facilities_guild_author_index"),
+        (FacilityQuery(guild_id=1, name_prefix="Ref"), "facilities_guild_name_index"),
+    ],
+)
+def test_facility_queries_use_indexes(tmp_path, query, index):
+    async def run():
+        db = Database(Bot(), tmp_path / "data.sqlite")
+        await db.open()
+        try:
+            return await db.query_plan(query)
+        finally:
+            await db.close()
+
+    plan = asyncio.run(run())
+    assert any(f"USING INDEX {index}" in step for step in plan), plan
+    assert not any(step.startswith("SCAN facilities") for step in plan), plan